@@ -11,6 +11,12 @@ setup(
         'scrapy',
     ],
 
+    entry_points={
+        'console_scripts': [
+            'zoho-extract = zoho.cli:main',
+        ],
+    },
+
     url='',
     license='',
     author='Gabe Wyatt',
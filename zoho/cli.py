@@ -0,0 +1,401 @@
+"""`zoho-extract` command line interface.
+
+Each subcommand imports only what it needs from within its handler, so operational commands such as `split` or
+`upload` start instantly and never load Scrapy (or touch the Zoho CRM API), while `split` never loads `boto3`.
+"""
+import argparse
+import ast
+import datetime
+import os
+import re
+import sys
+import tempfile
+import time
+
+from zoho import settings as project_settings
+
+
+class CommandSettings(object):
+    """Lightweight, read-only stand-in for `scrapy.settings.Settings`, populated from `zoho.settings`.
+
+    Only offers the `get` accessor used throughout the project, allowing `zoho.zoho_s3.ZohoS3` and friends to be
+    used without importing Scrapy.
+    """
+
+    def __init__(self, overrides=None):
+        """Initializes `CommandSettings` from every upper case name in `zoho.settings`, then applies `overrides`.
+
+        :param overrides: Setting values that take precedence over `zoho.settings` (optional, default: None).
+        :type overrides: dict or None
+        """
+        self.values = {name: getattr(project_settings, name) for name in dir(project_settings) if name.isupper()}
+        self.values.update(overrides or {})
+
+    def get(self, name, default=None):
+        """Retrieves the value of setting `name`.
+
+        :param name: Setting name.
+        :type name: str
+        :param default: Value returned when the setting is missing (optional, default: None).
+        :type default: object
+        :return: Setting value.
+        :rtype: object
+        """
+        return self.values.get(name, default)
+
+
+def parse_overrides(pairs):
+    """Converts `NAME=VALUE` pairs (as passed with `-s`) into a settings dict.
+
+    Values are evaluated as Python literals where possible (e.g. `1000`, `None`, `['Leads']`), otherwise kept as
+    strings.
+
+    :param pairs: List of `NAME=VALUE` strings.
+    :type pairs: list
+    :return: Parsed setting overrides.
+    :rtype: dict
+    """
+    overrides = dict()
+    for pair in pairs or []:
+        name, separator, value = pair.partition('=')
+        if not separator:
+            raise argparse.ArgumentTypeError('Setting must be formatted as NAME=VALUE: {0}'.format(pair))
+        try:
+            overrides[name] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            overrides[name] = value
+    return overrides
+
+
+def timestamped_dir(settings):
+    """Generates a new timestamped directory path within `LOCAL_OUTPUT_DIRECTORY`, formatted like spider runs.
+
+    :param settings: Active settings.
+    :type settings: CommandSettings
+    :return: Path to the (not yet created) timestamped directory.
+    :rtype: str
+    """
+    return os.path.join(settings.get('LOCAL_OUTPUT_DIRECTORY'),
+                        '{:%Y-%m-%d_%H-%M-%S}'.format(datetime.datetime.now()))
+
+
+def chunk_index(path):
+    """Sort key returning the numeric suffix of a split file (e.g. `Leads-12.json` -> 12).
+
+    :param path: Split file path.
+    :type path: str
+    :return: Chunk index, or -1 if the file name has no numeric suffix.
+    :rtype: int
+    """
+    match = re.search(r'-(\d+)$', os.path.splitext(os.path.basename(path))[0])
+    return int(match.group(1)) if match else -1
+
+
+def crawl(args, settings):
+    """Runs the `zoho` spider, exactly as `scrapy crawl zoho` would, optionally recording or replaying API
+    responses."""
+    from scrapy import cmdline
+
+    argv = ['scrapy', 'crawl', 'zoho']
+    if args.record or args.replay:
+        argv += ['-s', 'HTTPCACHE_ENABLED=True']
+    if args.replay:
+        # Never contact Zoho CRM: requests missing from the cache are ignored
+        argv += ['-s', 'HTTPCACHE_IGNORE_MISSING=True']
+    for pair in args.set or []:
+        argv += ['-s', pair]
+    # Locate the project settings without `scrapy.cfg`, so the installed command works from any directory
+    os.environ.setdefault('SCRAPY_SETTINGS_MODULE', 'zoho.settings')
+    cmdline.execute(argv)
+
+
+def split(args, settings):
+    """Splits existing export files into chunks within a new timestamped directory, without crawling."""
+    from zoho.split_file import SplitFile
+
+    if os.path.isdir(args.path):
+        paths = [os.path.join(args.path, name) for name in sorted(os.listdir(args.path))
+                 if os.path.isfile(os.path.join(args.path, name))]
+    else:
+        paths = [args.path]
+    dest_dir = args.dest or timestamped_dir(settings)
+    for path in paths:
+        file_name, extension = os.path.splitext(os.path.basename(path))
+        SplitFile(path=path,
+                  lines=args.lines or settings.get('OUTPUT_LINES_PER_FILE'),
+                  dest_dir=os.path.join(dest_dir, file_name))
+    print(dest_dir)
+
+
+def upload(args, settings):
+    """Uploads an existing timestamped export directory to Amazon S3, without crawling."""
+    from zoho.zoho_s3 import ZohoS3
+
+    ZohoS3(settings).upload_directory(args.path, args.bucket, args.run)
+
+
+def compact(args, settings):
+    """Merges the split files of every module (or partition) within a timestamped export directory and re-splits
+    them using `--lines` (or `OUTPUT_LINES_PER_FILE`) lines per file."""
+    from zoho.manifest import MANIFEST_FILE_NAME, MANIFESTS_DIR
+    from zoho.split_file import SplitFile
+
+    lines = args.lines or settings.get('OUTPUT_LINES_PER_FILE')
+    for root, dirs, files in os.walk(args.path):
+        dirs[:] = [name for name in dirs if name != MANIFESTS_DIR]
+        # Group chunks by the name of the file they were split from (e.g. `Leads-0.json` -> `Leads.json`)
+        groups = dict()
+        for file_name in files:
+            if file_name == MANIFEST_FILE_NAME or chunk_index(file_name) < 0:
+                continue
+            name, extension = os.path.splitext(file_name)
+            groups.setdefault(name.rsplit('-', 1)[0] + extension, []).append(os.path.join(root, file_name))
+        for merged_name, chunks in sorted(groups.items()):
+            # Re-split into a sibling directory first, so the original chunks survive any failure
+            with tempfile.TemporaryDirectory() as temp_dir, \
+                    tempfile.TemporaryDirectory(prefix='.compact-', dir=root) as staging_dir:
+                merged_path = os.path.join(temp_dir, merged_name)
+                with open(merged_path, 'wb') as merged:
+                    for chunk in sorted(chunks, key=chunk_index):
+                        with open(chunk, 'rb') as chunk_file:
+                            merged.write(chunk_file.read())
+                SplitFile(path=merged_path, lines=lines, dest_dir=staging_dir)
+                [os.remove(chunk) for chunk in chunks]
+                for file_name in os.listdir(staging_dir):
+                    os.replace(os.path.join(staging_dir, file_name), os.path.join(root, file_name))
+
+
+class BenchSpider(object):
+    """Stand-in for `zoho.spiders.zoho_crm_spider.ZohoSpider`, for benchmarking the pipeline without crawling."""
+
+    def __init__(self, settings):
+        """Initializes `BenchSpider` with a single `default` tenant.
+
+        :param settings: Active settings.
+        :type settings: CommandSettings
+        """
+        from zoho.tenants import Tenant
+
+        self.settings = settings
+        self.tenants = {'default': Tenant()}
+        self.timestamp_concatenated = 'bench'
+
+
+def synthetic_rows(count):
+    """Generates `count` synthetic rows shaped like Zoho CRM `Leads` records.
+
+    :param count: Number of rows.
+    :type count: int
+    :return: Rows of field name and (string) value pairs.
+    :rtype: generator
+    """
+    for index in range(count):
+        yield {'LEADID': str(2010964000000129904 + index),
+               'SMOWNERID': '2010964000000099003',
+               'Lead Owner': 'AJ',
+               'Company': 'Company {0}'.format(index),
+               'First Name': 'First{0}'.format(index),
+               'Last Name': 'Last{0}'.format(index),
+               'Email': 'lead{0}@example.com'.format(index),
+               'Phone': '240-286-{0:04d}'.format(index % 10000),
+               'Website': 'example{0}.com'.format(index),
+               'Lead Source': 'Public Relations',
+               'Lead Status': 'Pre Qualified',
+               'Industry': 'Education',
+               'No of Employees': str(index % 500),
+               'Annual Revenue': str(index * 1000),
+               'Email Opt Out': 'false',
+               'SMCREATORID': '2010964000000099003',
+               'Created By': 'AJ',
+               'MODIFIEDBY': '2010964000000099003',
+               'Modified By': 'AJ',
+               'Created Time': '2016-07-07 23:04:22',
+               'Modified Time': '2016-07-{0:02d} 23:04:22'.format(index % 28 + 1),
+               'Last Activity Time': '2016-07-07 23:04:22',
+               'CONVERTED': 'false'}
+
+
+def report(name, records, elapsed):
+    """Prints the throughput of a benchmark.
+
+    :param name: Benchmark name.
+    :type name: str
+    :param records: Number of records processed.
+    :type records: int
+    :param elapsed: Elapsed time in seconds.
+    :type elapsed: float
+    :return: Nothing
+    :rtype: None
+    """
+    print('{0}: {1} records in {2:.3f}s ({3:,.0f} records/sec)'.format(name, records, elapsed, records / elapsed))
+
+
+def bench_split(args, settings):
+    """Times `zoho.split_file.SplitFile` splitting a synthetic export file."""
+    import json
+    from zoho.split_file import SplitFile
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_path = os.path.join(temp_dir, 'Bench.json')
+        with open(source_path, 'w') as source:
+            source.writelines(json.dumps(row) + '\n' for row in synthetic_rows(args.records))
+        started = time.perf_counter()
+        SplitFile(path=source_path, lines=args.lines or settings.get('OUTPUT_LINES_PER_FILE'),
+                  dest_dir=os.path.join(temp_dir, 'split'))
+        report('split', args.records, time.perf_counter() - started)
+
+
+def bench_pipeline(args, settings):
+    """Times `zoho.pipelines.MultiRecordPipeline` exporting a synthetic org, one `Record` per row (as before) and one
+    `RecordPage` per 200 rows."""
+    from zoho.items import Record, RecordPage
+    from zoho.pipelines import MultiRecordPipeline
+
+    def run(items):
+        pipeline = MultiRecordPipeline()
+        pipeline.spider_opened(spider)
+        started = time.perf_counter()
+        for item in items:
+            pipeline.process_item(item, spider)
+        pipeline.finish_exports()
+        return time.perf_counter() - started
+
+    rows = list(synthetic_rows(args.records))
+    records = []
+    for row in rows:
+        record = Record(tenant='default', module='Leads')
+        for key, value in row.items():
+            record[key] = value
+        records.append(record)
+    pages = [RecordPage(tenant='default', module='Leads', deleted=False, records=rows[index:index + 200])
+             for index in range(0, len(rows), 200)]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        spider = BenchSpider(CommandSettings(dict(settings.values, LOCAL_OUTPUT_DIRECTORY=temp_dir)))
+        per_record = run(records)
+        per_page = run(pages)
+    report('pipeline (per record)', args.records, per_record)
+    report('pipeline (per page)', args.records, per_page)
+    print('pipeline speedup: {0:.2f}x'.format(per_record / per_page))
+
+
+def bench_replay(args, settings):
+    """Times `zoho.spiders.zoho_crm_spider.ZohoSpider` parsing, and `zoho.pipelines.MultiRecordPipeline` exporting,
+    the record pages of a recorded crawl (see `crawl --record`)."""
+    import scrapy
+    from scrapy.settings import Settings
+    from zoho.httpcache import ZohoCacheStorage, cache_directory
+    from zoho.items import RecordPage
+    from zoho.pipelines import MultiRecordPipeline
+    from zoho.spiders.zoho_crm_spider import ZohoSpider
+    from zoho.tenants import Tenant
+
+    cache_dir = os.path.join(cache_directory(settings), ZohoSpider.name)
+    callbacks = {'getRecords': 'parse_records', 'getDeletedRecordIds': 'parse_deleted_records'}
+    recorded = [data for data in ZohoCacheStorage.recorded(cache_dir) if data['key'][2] in callbacks]
+    if not recorded:
+        print('replay: no recorded pages in {0}'.format(cache_dir))
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        spider = ZohoSpider(settings=Settings(dict(settings.values, LOCAL_OUTPUT_DIRECTORY=temp_dir,
+                                                   ZOHO_TYPED_OUTPUT=False)))
+        responses = []
+        for data in recorded:
+            tenant_name, module, method, last_modified_time, from_index = data['key']
+            spider.tenants.setdefault(tenant_name, Tenant(tenant_name))
+            request = scrapy.Request(data['url'], meta={'tenant': tenant_name, 'module': module, 'method': method,
+                                                        'from_index': from_index})
+            responses.append((getattr(spider, callbacks[method]), ZohoCacheStorage.build_response(data, request)))
+
+        started = time.perf_counter()
+        pages = [result for parse, response in responses for result in parse(response)
+                 if isinstance(result, RecordPage)]
+        parsed = time.perf_counter() - started
+        records = sum(len(page['records']) for page in pages)
+
+        pipeline = MultiRecordPipeline()
+        pipeline.spider_opened(spider)
+        started = time.perf_counter()
+        for page in pages:
+            pipeline.process_item(page, spider)
+        pipeline.finish_exports()
+        exported = time.perf_counter() - started
+    report('replay parse ({0} responses)'.format(len(responses)), records, parsed)
+    report('replay export', records, exported)
+
+
+def bench(args, settings):
+    """Times the local processing stages against a synthetic org (or recorded crawl) and reports records per
+    second."""
+    targets = {'pipeline': bench_pipeline, 'replay': bench_replay, 'split': bench_split}
+    for target in args.target or sorted(targets):
+        targets[target](args, settings)
+
+
+def build_parser():
+    """Builds the `argparse.ArgumentParser` for all `zoho-extract` subcommands.
+
+    :return: Configured parser.
+    :rtype: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(prog='zoho-extract',
+                                     description='Extract Zoho CRM API data and upload to AWS S3.')
+    parser.add_argument('-s', '--set', action='append', metavar='NAME=VALUE',
+                        help='Override a setting from zoho/settings.py (may be repeated).')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    crawl_parser = subparsers.add_parser('crawl', help='Crawl Zoho CRM, then split and upload the export.')
+    crawl_mode = crawl_parser.add_mutually_exclusive_group()
+    crawl_mode.add_argument('--record', action='store_true',
+                            help='Record API responses to HTTPCACHE_DIR, replaying any already recorded.')
+    crawl_mode.add_argument('--replay', action='store_true',
+                            help='Replay recorded API responses only, without contacting Zoho CRM.')
+    crawl_parser.set_defaults(handler=crawl)
+
+    split_parser = subparsers.add_parser('split', help='Split existing export files into chunks.')
+    split_parser.add_argument('path', help='Export file, or directory of export files, to split.')
+    split_parser.add_argument('--dest', help='Destination directory (default: new timestamped directory).')
+    split_parser.add_argument('--lines', type=int, help='Lines per file (default: OUTPUT_LINES_PER_FILE).')
+    split_parser.set_defaults(handler=split)
+
+    upload_parser = subparsers.add_parser('upload', help='Upload an existing timestamped export directory to S3.')
+    upload_parser.add_argument('path', help='Timestamped export directory to upload.')
+    upload_parser.add_argument('--bucket', help='S3 bucket to upload to (default: AWS_BUCKET_NAME).')
+    upload_parser.add_argument('--run', help='Upload only this crawl (timestamp) from a partition root directory.')
+    upload_parser.set_defaults(handler=upload)
+
+    compact_parser = subparsers.add_parser('compact', help='Merge and re-split the chunks of an export directory.')
+    compact_parser.add_argument('path', help='Timestamped export directory to compact.')
+    compact_parser.add_argument('--lines', type=int, help='Lines per file (default: OUTPUT_LINES_PER_FILE).')
+    compact_parser.set_defaults(handler=compact)
+
+    bench_parser = subparsers.add_parser('bench', help='Benchmark local processing against a synthetic org.')
+    bench_parser.add_argument('--records', type=int, default=100000, help='Synthetic records (default: 100000).')
+    bench_parser.add_argument('--lines', type=int, help='Lines per file (default: OUTPUT_LINES_PER_FILE).')
+    bench_parser.add_argument('--target', action='append', choices=['pipeline', 'replay', 'split'],
+                              help='Stage to benchmark, may be repeated (default: all).')
+    bench_parser.set_defaults(handler=bench)
+    return parser
+
+
+def main(argv=None):
+    """Entry point for the `zoho-extract` console script.
+
+    :param argv: Command line arguments (optional, default: `sys.argv[1:]`).
+    :type argv: list or None
+    :return: Nothing
+    :rtype: None
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        overrides = parse_overrides(args.set)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    args.handler(args, CommandSettings(overrides))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,324 @@
+import collections
+import gzip
+import json
+import logging
+import os
+import pickle
+import re
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
+
+from zoho.tenants import DEFAULT_TENANT_NAME
+
+CACHE_FILE_EXTENSION = '.pickle.gz'
+# Favours speed over size, since JSON payloads compress well regardless
+COMPRESS_LEVEL = 6
+# Query parameters excluded from cache keys and stored URLs
+SECRET_PARAMS = frozenset(['authtoken'])
+
+
+def cache_directory(settings):
+    """Resolves `HTTPCACHE_DIR` as Scrapy does, falling back to `.scrapy` within the working directory when running
+    without `scrapy.cfg` (e.g. the installed `zoho-extract` command), where Scrapy would disable the cache.
+
+    :param settings: Active settings.
+    :type settings: scrapy.settings.Settings
+    :return: Path to the HTTP cache directory.
+    :rtype: str
+    """
+    path = settings.get('HTTPCACHE_DIR') or 'httpcache'
+    try:
+        return data_path(path)
+    except NotConfigured:
+        return os.path.join('.scrapy', path)
+
+
+def request_key(request):
+    """Builds the cache key of a Zoho CRM API request from its tenant, module, method, `lastModifiedTime` and
+    `fromIndex`, ignoring the auth token so recorded crawls can be replayed with any (or no) credentials.
+
+    :param request: Zoho CRM API request.
+    :type request: scrapy.Request
+    :return: Key parts: tenant, module, method, last modified time and from index.
+    :rtype: tuple
+    """
+    url = urlsplit(request.url)
+    module, method = url.path.rstrip('/').split('/')[-2:]
+    params = dict(parse_qsl(url.query))
+    return (request.meta.get('tenant', DEFAULT_TENANT_NAME),
+            module,
+            method,
+            params.get('lastModifiedTime', ''),
+            int(params.get('fromIndex', 0)))
+
+
+def strip_secrets(url):
+    """Removes the auth token from `url`, so it is never written to the cache.
+
+    :param url: Zoho CRM API URL.
+    :type url: str
+    :return: URL without secret query parameters.
+    :rtype: str
+    """
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query) if name not in SECRET_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def decode_body(body, headers):
+    """Decodes a response body according to its `Content-Encoding`, since the cache stores responses before Scrapy's
+    `HttpCompressionMiddleware` decompresses them.
+
+    :param body: Response body, as downloaded.
+    :type body: bytes
+    :param headers: Response headers.
+    :type headers: scrapy.http.Headers
+    :return: Decoded body, or None if an encoding is not supported (e.g. br).
+    :rtype: bytes or None
+    """
+    encodings = headers.getlist('Content-Encoding')
+    # Encodings are listed in the order they were applied
+    for encoding in reversed([e.strip().lower() for value in encodings for e in value.decode().split(',')]):
+        if encoding in ('gzip', 'x-gzip'):
+            body = gzip.decompress(body)
+        elif encoding == 'deflate':
+            try:
+                body = zlib.decompress(body)
+            except zlib.error:
+                # Some servers send raw deflate data without the zlib header
+                body = zlib.decompress(body, -zlib.MAX_WBITS)
+        elif encoding not in ('', 'identity'):
+            return None
+    return body
+
+
+def is_error_response(body):
+    """Determines if a response body is a Zoho CRM API error (e.g. an exhausted API limit), which must not be
+    replayed.
+
+    :param body: Response body.
+    :type body: bytes
+    :return: Is the body an error response.
+    :rtype: bool
+    """
+    # Only deserialize bodies that may be errors
+    if b'"error"' not in body[:512]:
+        return False
+    try:
+        return 'error' in json.loads(body.decode())['response']
+    except (ValueError, KeyError, TypeError):
+        return False
+
+
+class ZohoCacheStorage:
+    """Scrapy HTTP cache storage for Zoho CRM API responses, allowing whole crawls to be recorded and replayed offline.
+
+    Each response is stored as a single compressed file at `<tenant>/<module>/<method>/<lastModifiedTime>/<fromIndex>`
+    within `HTTPCACHE_DIR`, so changes to parsing or output logic can be re-run without spending API quota.  Once the
+    cache exceeds `ZOHO_HTTPCACHE_MAX_SIZE`, the least recently used responses are evicted.
+
+    Enabled via `HTTPCACHE_ENABLED` with `HTTPCACHE_STORAGE = 'zoho.httpcache.ZohoCacheStorage'`.
+    """
+
+    def __init__(self, settings):
+        """Initializes the `ZohoCacheStorage` class.
+
+        :param settings: Active settings.
+        :type settings: scrapy.settings.Settings
+        """
+        self.cache_dir = cache_directory(settings)
+        self.expiration_secs = int(settings.get('HTTPCACHE_EXPIRATION_SECS') or 0)
+        max_size = settings.get('ZOHO_HTTPCACHE_MAX_SIZE')
+        self.max_size = int(max_size * 1024 * 1024) if max_size else None
+        self.spider_dir = None
+        # Size per cached file, least recently used first
+        self.entries = collections.OrderedDict()
+        self.size = 0
+
+    def open_spider(self, spider):
+        """Indexes existing cache files by last use, for eviction.
+
+        :param spider: Spider being cached.
+        :type spider: scrapy.Spider
+        :return: Nothing
+        :rtype: None
+        """
+        self.spider_dir = os.path.join(self.cache_dir, spider.name)
+        files = []
+        for root, dirs, file_names in os.walk(self.spider_dir):
+            for file_name in file_names:
+                if file_name.endswith(CACHE_FILE_EXTENSION):
+                    stat = os.stat(os.path.join(root, file_name))
+                    files.append((stat.st_mtime, os.path.join(root, file_name), stat.st_size))
+        for mtime, path, size in sorted(files):
+            self.entries[path] = size
+            self.size += size
+        logging.debug('Using Zoho CRM cache storage in {0} ({1} responses, {2} bytes).'.format(
+            self.spider_dir, len(self.entries), self.size))
+
+    def close_spider(self, spider):
+        """Evicts responses beyond `ZOHO_HTTPCACHE_MAX_SIZE`.
+
+        :param spider: Spider being cached.
+        :type spider: scrapy.Spider
+        :return: Nothing
+        :rtype: None
+        """
+        self.evict()
+
+    def get_path(self, request):
+        """Constructs the cache file path of `request`.
+
+        :param request: Zoho CRM API request.
+        :type request: scrapy.Request
+        :return: Path to the cache file.
+        :rtype: str
+        """
+        tenant_name, module, method, last_modified_time, from_index = request_key(request)
+        since = re.sub(r'[^0-9A-Za-z]', '', last_modified_time) or 'all'
+        return os.path.join(self.spider_dir, tenant_name, module, method, since,
+                            '{0}{1}'.format(from_index, CACHE_FILE_EXTENSION))
+
+    def retrieve_response(self, spider, request):
+        """Retrieves the cached response of `request`.
+
+        :param spider: Spider being cached.
+        :type spider: scrapy.Spider
+        :param request: Zoho CRM API request.
+        :type request: scrapy.Request
+        :return: Cached response, or None if missing or expired.
+        :rtype: scrapy.http.Response or None
+        """
+        path = self.get_path(request)
+        data = self.load(path)
+        if data is None:
+            return None
+        if 0 < self.expiration_secs < time.time() - data['timestamp']:
+            return None
+        # Mark as recently used
+        os.utime(path)
+        if path in self.entries:
+            self.entries.move_to_end(path)
+        return self.build_response(data, request)
+
+    def store_response(self, spider, request, response):
+        """Stores the (decoded) response of `request`, unless it failed: statuses other than 200 and Zoho CRM API
+        errors are never stored, so temporary outages aren't replayed.
+
+        :param spider: Spider being cached.
+        :type spider: scrapy.Spider
+        :param request: Zoho CRM API request.
+        :type request: scrapy.Request
+        :param response: Downloaded response.
+        :type response: scrapy.http.Response
+        :return: Nothing
+        :rtype: None
+        """
+        if response.status != 200:
+            logging.debug('Response with status {0} not cached, url: {1}.'.format(response.status,
+                                                                                  strip_secrets(request.url)))
+            return
+        try:
+            body = decode_body(response.body, response.headers)
+        except (OSError, EOFError, zlib.error):
+            body = None
+        if body is None:
+            logging.debug('Undecodable response not cached, url: {0}.'.format(strip_secrets(request.url)))
+            return
+        if is_error_response(body):
+            logging.debug('Error response not cached, url: {0}.'.format(strip_secrets(request.url)))
+            return
+        path = self.get_path(request)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Stored decoded, so the encoding headers no longer apply
+        headers = dict((name, value) for name, value in response.headers.items()
+                       if name.lower() not in (b'content-encoding', b'content-length'))
+        data = {'key': request_key(request),
+                'url': strip_secrets(response.url),
+                'status': response.status,
+                'headers': headers,
+                'body': body,
+                'timestamp': time.time()}
+        # Write atomically, so an interrupted crawl never leaves a partial response behind
+        temp_path = path + '.tmp'
+        with gzip.open(temp_path, 'wb', compresslevel=COMPRESS_LEVEL) as file:
+            pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        self.size -= self.entries.pop(path, 0)
+        self.entries[path] = os.path.getsize(path)
+        self.size += self.entries[path]
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used responses until the cache fits within `ZOHO_HTTPCACHE_MAX_SIZE`.
+
+        :return: Nothing
+        :rtype: None
+        """
+        while self.max_size and self.size > self.max_size and self.entries:
+            path, size = self.entries.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            logging.debug('Evicted cached response: {0}.'.format(path))
+
+    @staticmethod
+    def load(path):
+        """Loads a cache file.
+
+        :param path: Path to the cache file.
+        :type path: str
+        :return: Cached response data, or None if missing or unreadable.
+        :rtype: dict or None
+        """
+        try:
+            with gzip.open(path, 'rb') as file:
+                return pickle.load(file)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    @staticmethod
+    def build_response(data, request=None):
+        """Rebuilds a response from cached response data.
+
+        :param data: Cached response data.
+        :type data: dict
+        :param request: Request the response answers (optional, default: None -- The recorded, token-less URL is used).
+        :type request: scrapy.Request or None
+        :return: Rebuilt response.
+        :rtype: scrapy.http.Response
+        """
+        url = request.url if request is not None else data['url']
+        headers = Headers(data['headers'])
+        body = data['body']
+        # Responses recorded before bodies were stored decoded
+        if headers.get('Content-Encoding'):
+            body = decode_body(body, headers) or body
+            headers.pop('Content-Encoding')
+            headers.pop('Content-Length', None)
+        response_class = responsetypes.from_args(headers=headers, url=url, body=body)
+        return response_class(url=url, status=data['status'], headers=headers, body=body, request=request)
+
+    @classmethod
+    def recorded(cls, cache_dir):
+        """Loads every response recorded within `cache_dir` (e.g. `<HTTPCACHE_DIR>/zoho`), in key order.
+
+        :param cache_dir: Spider cache directory.
+        :type cache_dir: str
+        :return: Cached response data.
+        :rtype: generator
+        """
+        paths = []
+        for root, dirs, file_names in os.walk(cache_dir):
+            paths += [os.path.join(root, name) for name in file_names if name.endswith(CACHE_FILE_EXTENSION)]
+        entries = [data for data in (cls.load(path) for path in paths) if data is not None]
+        for data in sorted(entries, key=lambda entry: entry['key']):
+            yield data
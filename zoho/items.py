@@ -29,3 +29,17 @@ class Record(scrapy.Item):
         if key not in self.fields:
             self.fields[key] = Field()
         self._values[key] = value
+
+
+class RecordPage(scrapy.Item):
+    """A full page (up to 200) of `Records` returned by a single getRecords or getDeletedRecordIds API call.
+
+    Handing over whole pages lets `zoho.pipelines.MultiRecordPipeline` serialize and write each page in one pass.
+
+    :param scrapy.Item: Inherited `scrapy.Item`
+    :type scrapy.Item: scrapy.Item
+    """
+    deleted = Field()
+    module = Field()
+    records = Field()
+    tenant = Field()
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import zlib
+
+MANIFEST_FILE_NAME = 'manifest.json'
+# Directory of per-crawl manifests within a partition root, hidden from query engines by its leading underscore
+MANIFESTS_DIR = '_manifests'
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+class Manifest:
+    """Describes every file within a timestamped export directory: object key, size, MD5 and CRC32 checksums and row
+    count, keyed by the file's path relative to the directory.
+
+    Uploads record the manifest alongside the exported files, allowing later runs (or retries) to skip content that
+    is already in S3.
+    """
+
+    def __init__(self, entries=None):
+        """Initializes the `Manifest` class.
+
+        :param entries: Entries keyed by relative (forward slash separated) path (optional, default: None).
+        :type entries: dict or None
+        """
+        self.entries = entries or dict()
+        # Uploaded entries by MD5 checksum, built on first lookup (see `index_uploaded`)
+        self.uploaded = None
+
+    @staticmethod
+    def describe(path):
+        """Computes the size, checksums and row count of a file in a single pass.
+
+        :param path: Path to the file.
+        :type path: str
+        :return: Entry with `size`, `md5`, `crc32` and `rows` values.
+        :rtype: dict
+        """
+        crc32 = 0
+        md5 = hashlib.md5()
+        rows = 0
+        size = 0
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(READ_BLOCK_SIZE), b''):
+                crc32 = zlib.crc32(block, crc32)
+                md5.update(block)
+                rows += block.count(b'\n')
+                size += len(block)
+        return {'size': size,
+                'md5': md5.hexdigest(),
+                'crc32': '{0:08x}'.format(crc32 & 0xffffffff),
+                'rows': rows}
+
+    @staticmethod
+    def manifest_path(local_dir, run=None):
+        """Constructs the path of the manifest of `local_dir`, or of crawl `run` within a partition root.
+
+        :param local_dir: Timestamped export directory, or partition root directory if `run` is passed.
+        :type local_dir: str
+        :param run: Name of the crawl within a partition root (optional, default: None).
+        :type run: str or None
+        :return: Path to the manifest file.
+        :rtype: str
+        """
+        if run is None:
+            return os.path.join(local_dir, MANIFEST_FILE_NAME)
+        return os.path.join(local_dir, MANIFESTS_DIR, run + '.json')
+
+    @classmethod
+    def from_directory(cls, local_dir, run=None):
+        """Builds a new `Manifest` describing every file within `local_dir` (recursively), excluding any manifest.
+
+        :param local_dir: Timestamped export directory, or partition root directory if `run` is passed.
+        :type local_dir: str
+        :param run: Only describe chunk files of this crawl, named `<Module>-<run>-<N>` (optional, default: None).
+        :type run: str or None
+        :return: New manifest.
+        :rtype: zoho.manifest.Manifest
+        """
+        entries = dict()
+        for root, dirs, files in os.walk(local_dir):
+            dirs[:] = [name for name in dirs if name != MANIFESTS_DIR]
+            for file_name in files:
+                if run is not None and '-{0}-'.format(run) not in file_name:
+                    continue
+                path = os.path.join(root, file_name)
+                relative_path = os.path.relpath(path, local_dir).replace('\\', '/')
+                if relative_path == MANIFEST_FILE_NAME:
+                    continue
+                entries[relative_path] = cls.describe(path)
+        return cls(entries)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a previously saved `Manifest`.
+
+        :param path: Path to the manifest file.
+        :type path: str
+        :return: Loaded manifest, or None if no (valid) manifest exists at `path`.
+        :rtype: zoho.manifest.Manifest or None
+        """
+        try:
+            with open(path) as file:
+                return cls(json.load(file)['entries'])
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+
+    @classmethod
+    def load_previous(cls, local_dir, run=None):
+        """Loads the manifest of `local_dir` itself (a retried upload) or, failing that, of the most recent earlier
+        timestamped directory alongside it.  Within a partition root, the manifests of crawl `run` and earlier crawls
+        are considered instead.
+
+        :param local_dir: Timestamped export directory being uploaded, or partition root directory if `run` is passed.
+        :type local_dir: str
+        :param run: Name of the crawl being uploaded from a partition root (optional, default: None).
+        :type run: str or None
+        :return: Previous manifest, or None if no earlier upload recorded one.
+        :rtype: zoho.manifest.Manifest or None
+        """
+        if run is not None:
+            manifests_dir = os.path.join(local_dir, MANIFESTS_DIR)
+            names = sorted(os.listdir(manifests_dir), reverse=True) if os.path.isdir(manifests_dir) else []
+            candidates = [os.path.join(manifests_dir, name) for name in names if name <= run + '.json']
+            return cls.load_first(candidates)
+        local_dir = os.path.normpath(local_dir)
+        parent_dir, run_name = os.path.split(local_dir)
+        candidates = [local_dir]
+        parent_dir = parent_dir or '.'
+        if os.path.isdir(parent_dir):
+            candidates += [os.path.join(parent_dir, name) for name in sorted(os.listdir(parent_dir), reverse=True)
+                           if name < run_name]
+        return cls.load_first([cls.manifest_path(candidate) for candidate in candidates])
+
+    @classmethod
+    def load_first(cls, paths):
+        """Loads the first valid manifest of `paths`, indexing its uploaded entries.
+
+        :param paths: Paths to manifest files, in order of preference.
+        :type paths: list
+        :return: First valid manifest, or None.
+        :rtype: zoho.manifest.Manifest or None
+        """
+        for path in paths:
+            manifest = cls.load(path)
+            if manifest is not None:
+                manifest.index_uploaded()
+                return manifest
+        return None
+
+    def index_uploaded(self):
+        """Indexes uploaded entries by MD5 checksum, so lookups don't scan every entry.
+
+        :return: Nothing
+        :rtype: None
+        """
+        self.uploaded = dict()
+        for entry in self.entries.values():
+            if entry.get('uploaded'):
+                self.uploaded.setdefault(entry['md5'], []).append(entry)
+
+    def find_uploaded(self, md5, object_key=None):
+        """Finds an uploaded entry with the passed MD5 checksum (and object key, if passed).
+
+        :param md5: MD5 checksum (hex digest).
+        :type md5: str
+        :param object_key: S3 key the content must be stored at (optional, default: None -- Any key).
+        :type object_key: str or None
+        :return: Matching entry, or None.
+        :rtype: dict or None
+        """
+        if self.uploaded is None:
+            self.index_uploaded()
+        for entry in self.uploaded.get(md5, []):
+            if object_key in (None, entry.get('object_key')):
+                return entry
+        return None
+
+    def save(self, path):
+        """Saves the manifest as JSON.
+
+        :param path: Path to the manifest file.
+        :type path: str
+        :return: Nothing
+        :rtype: None
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump({'entries': self.entries}, file, indent=2, sort_keys=True)
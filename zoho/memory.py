@@ -0,0 +1,54 @@
+import sys
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+
+def current_rss():
+    """Determines the current resident set size (RSS) of this process.
+
+    Reads `/proc/self/statm` where available (Linux), otherwise falls back to the peak RSS reported by `resource`.
+
+    :return: Resident set size in bytes (0 if it cannot be determined).
+    :rtype: int
+    """
+    if resource is None:
+        return 0
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (IOError, OSError, IndexError, ValueError):
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Reported in bytes on macOS and kilobytes elsewhere
+        return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+class MemoryBudget:
+    """Tracks process memory growth against the `ZOHO_MEMORY_BUDGET` setting.
+
+    Growth is measured above the RSS at creation (i.e. the start of the crawl), since Scrapy alone already occupies
+    tens of megabytes before any data is retrieved.
+    """
+
+    def __init__(self, limit_mb, threshold=0.8):
+        """Initializes the `MemoryBudget` class.
+
+        :param limit_mb: Memory budget in megabytes.
+        :type limit_mb: int
+        :param threshold: Fraction of the budget at which the budget is considered near (optional, default: 0.8).
+        :type threshold: float
+        """
+        self.baseline = current_rss()
+        self.limit = limit_mb * 1024 * 1024
+        self.threshold = threshold
+
+    def is_near(self):
+        """Determines if memory growth since the start of the crawl is approaching the budget.
+
+        :return: Is RSS growth at or above `threshold` of the budget.
+        :rtype: bool
+        """
+        return current_rss() - self.baseline >= self.limit * self.threshold
@@ -0,0 +1,134 @@
+import collections
+import os
+import re
+
+# Partition for rows without a (valid) date, following the Hive convention
+DEFAULT_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+DATE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})')
+# Maximum simultaneously open partition files; least recently written files are closed beyond this
+MAX_OPEN_FILES = 64
+
+
+class PartitionedWriter:
+    """Writes exported rows into Hive-style `module=<Module>/dt=<YYYY-MM-DD>` partition directories, each holding
+    numerically incremented chunk files of at most `lines` rows.
+
+    Rows are routed by the date portion of their `field` value (e.g. `Modified Time`).  Partitions of every crawl share
+    a single root directory, allowing query engines to treat it as one table and prune by module and date, while the
+    `run` name within each chunk file name keeps crawls from colliding.
+    """
+
+    def __init__(self, output_dir, field, lines=1000, file_type='json', run=None):
+        """Initializes the `PartitionedWriter` class.
+
+        :param output_dir: Root directory in which to create partition directories, shared by all crawls.
+        :type output_dir: str
+        :param field: Name of the date field to partition rows by.
+        :type field: str
+        :param lines: The maximum number of lines for each chunk file (optional, default: 1000).
+        :type lines: int
+        :param file_type: The desired file extension (optional, default: json).
+        :type file_type: str
+        :param run: Name of the crawl included in chunk file names, e.g. its timestamp (optional, default: None).
+        :type run: str or None
+        """
+        self.field = field
+        self.file_type = file_type
+        self.files = collections.OrderedDict()
+        self.lines = lines
+        self.output_dir = output_dir
+        self.run = run
+        # [chunk index, lines in chunk] per (module, partition)
+        self.chunks = dict()
+
+    def close(self):
+        """Closes all open partition files.
+
+        :return: Nothing
+        :rtype: None
+        """
+        [f.close() for f in self.files.values()]
+        self.files.clear()
+
+    def get_file(self, module, partition):
+        """Retrieves the open chunk file for `module` and `partition`, rolling over to a new chunk once full.
+
+        :param module: Module (exporter) name, e.g. `Leads` or `Leads-Deleted`.
+        :type module: str
+        :param partition: Partition value (date).
+        :type partition: str
+        :return: Chunk file opened for binary appending.
+        :rtype: io.BufferedWriter
+        """
+        key = (module, partition)
+        chunk = self.chunks.setdefault(key, [0, 0])
+        if chunk[1] >= self.lines:
+            # Current chunk is full
+            chunk[0] += 1
+            chunk[1] = 0
+            if key in self.files:
+                self.files.pop(key).close()
+
+        if key in self.files:
+            self.files.move_to_end(key)
+            return self.files[key]
+
+        partition_dir = os.path.join(self.output_dir, 'module=' + module, 'dt=' + partition)
+        os.makedirs(partition_dir, exist_ok=True)
+        # Chunks of each crawl are named `<Module>-<run>-<N>`, so crawls sharing a partition never collide
+        name = module if self.run is None else '{0}-{1}'.format(module, self.run)
+        file_name = os.path.join(partition_dir, '{0}-{1}.{2}'.format(name, chunk[0], self.file_type))
+        self.files[key] = open(file_name, 'ab')
+        if len(self.files) > MAX_OPEN_FILES:
+            self.files.popitem(last=False)[1].close()
+        return self.files[key]
+
+    def partition(self, row):
+        """Determines the partition value of `row` from the date portion of its `field` value.
+
+        :param row: Exported row.
+        :type row: dict or zoho.items.Record
+        :return: Date (`YYYY-MM-DD`), or `DEFAULT_PARTITION` if the row has no valid date.
+        :rtype: str
+        """
+        match = DATE_PATTERN.match(str(row.get(self.field) or ''))
+        return match.group(1) if match else DEFAULT_PARTITION
+
+    def write(self, module, row, line):
+        """Writes a serialized row into its partition.
+
+        :param module: Module (exporter) name, e.g. `Leads` or `Leads-Deleted`.
+        :type module: str
+        :param row: Exported row, used to determine the partition.
+        :type row: dict or zoho.items.Record
+        :param line: Serialized row, including trailing newline.
+        :type line: bytes
+        :return: Nothing
+        :rtype: None
+        """
+        self.write_page(module, [row], [line])
+
+    def write_page(self, module, rows, lines):
+        """Writes a page of serialized rows into their partitions, with a single write per chunk file.
+
+        :param module: Module (exporter) name, e.g. `Leads` or `Leads-Deleted`.
+        :type module: str
+        :param rows: Exported rows, used to determine partitions.
+        :type rows: list
+        :param lines: Serialized rows (in the same order as `rows`), including trailing newlines.
+        :type lines: list
+        :return: Nothing
+        :rtype: None
+        """
+        partitioned = collections.OrderedDict()
+        for row, line in zip(rows, lines):
+            partitioned.setdefault(self.partition(row), []).append(line)
+        for partition, partition_lines in partitioned.items():
+            while partition_lines:
+                file = self.get_file(module, partition)
+                chunk = self.chunks[(module, partition)]
+                # Fill the current chunk, rolling over to the next for any remaining lines
+                available = self.lines - chunk[1]
+                file.write(b''.join(partition_lines[:available]))
+                chunk[1] += len(partition_lines[:available])
+                partition_lines = partition_lines[available:]
@@ -1,10 +1,36 @@
 import os
-from scrapy.xlib.pydispatch import dispatcher
+try:
+    from scrapy.xlib.pydispatch import dispatcher
+except ImportError:
+    # `scrapy.xlib` was removed in later Scrapy releases, which depend on PyDispatcher directly
+    from pydispatch import dispatcher
 from scrapy import signals
 from scrapy.exporters import JsonLinesItemExporter
+from scrapy.utils.serialize import ScrapyJSONEncoder
 import tempfile
+from zoho.items import RecordPage
+from zoho.partitions import PartitionedWriter
 from zoho.split_file import SplitFile
-from zoho.zoho_s3 import ZohoS3
+
+
+class TenantExports(object):
+    """Exporters, files and partitions of a single `zoho.tenants.Tenant`, isolating each tenant's pipeline state.
+
+    :param object: Base object.
+    :type object: object
+    """
+
+    def __init__(self, tenant):
+        """Initializes `TenantExports`.
+
+        :param tenant: Zoho CRM org the exports belong to.
+        :type tenant: zoho.tenants.Tenant
+        """
+        self.exporters = dict()
+        self.files = dict()
+        # Date-partitioned output, see `OUTPUT_PARTITION_FIELD`
+        self.partitions = None
+        self.tenant = tenant
 
 
 class MultiRecordPipeline(object):
@@ -13,24 +39,45 @@ class MultiRecordPipeline(object):
     :param object: Necessary extension as a Pipeline class.
     :type object: object
     """
-    exporters = dict()
-    files = dict()
+    file_type = None
+    include_module_name = False
+    partition_field = None
     spider = None
+    spool_max_size = None
+    spool_total_max_size = None
+    write_buffer_size = -1
 
     def __init__(self):
         """Initializes `MultiRecordPipeline while also calling `spider_opened` and `spider_closed` methods."""
+        # Serializes rows of record pages and date-partitioned output
+        self.encoder = ScrapyJSONEncoder()
+        # Exports per tenant name
+        self.tenant_exports = dict()
+        # Sizes of module files still held in memory, per (tenant name, module file name), and their total
+        self.in_memory = dict()
+        self.in_memory_size = 0
+        # Module files moved to disk, per (tenant name, module file name)
+        self.spooled = set()
         dispatcher.connect(self.spider_opened, signal=signals.spider_opened)
         dispatcher.connect(self.spider_closed, signal=signals.spider_closed)
 
     def spider_opened(self, spider):
         """Required for inheritance and used to assign the `scrapy.Spider` instance to `self.spider` for later use.
 
+        Settings consulted for every item are also looked up once here.
+
         :param spider: `scrapy.Spider` in use by the current pipeline.
         :type spider: scrapy.Spider
         :return: Nothing
         :rtype: None
         """
         self.spider = spider
+        self.file_type = spider.settings.get('OUTPUT_FILE_TYPE')
+        self.include_module_name = spider.settings.get('ZOHO_INCLUDE_MODULE_NAME')
+        self.partition_field = spider.settings.get('OUTPUT_PARTITION_FIELD')
+        self.spool_max_size = spider.settings.get('OUTPUT_SPOOL_MAX_SIZE')
+        self.spool_total_max_size = spider.settings.get('OUTPUT_SPOOL_TOTAL_MAX_SIZE')
+        self.write_buffer_size = spider.settings.get('OUTPUT_WRITE_BUFFER_SIZE') or -1
 
     def spider_closed(self, spider):
         """During closing process, finishe all exporters, close files, split files, and upload files.
@@ -40,18 +87,67 @@ class MultiRecordPipeline(object):
         :return: Nothing
         :rtype: None
         """
-        [e.finish_exporting() for e in self.exporters.values()]
-        [f.close() for f in self.files.values()]
-
-        # Split temporary files into appropriate sizes
-        self.split_files()
+        self.finish_exports()
+        for exports in self.tenant_exports.values():
+            # Split temporary files into appropriate sizes
+            self.split_files(exports)
 
         # Upload
         self.upload_files()
 
-    def create_exporter(self, name, file_type='json'):
+    def finish_exports(self):
+        """Finishes all exporters and closes all partitions of every tenant.
+
+        Exporter files are left open (being temporary, closing them discards their content) until `split_files`.
+
+        :return: Nothing
+        :rtype: None
+        """
+        for exports in self.tenant_exports.values():
+            [e.finish_exporting() for e in exports.exporters.values()]
+            [f.flush() for f in exports.files.values()]
+            if exports.partitions is not None:
+                exports.partitions.close()
+
+    def get_exports(self, tenant_name):
+        """Retrieves the `TenantExports` of the passed tenant, creating it on first use.
+
+        :param tenant_name: Name of the `zoho.tenants.Tenant`.
+        :type tenant_name: str
+        :return: Exports of the tenant.
+        :rtype: TenantExports
+        """
+        if tenant_name not in self.tenant_exports:
+            self.tenant_exports[tenant_name] = TenantExports(self.spider.tenants[tenant_name])
+        return self.tenant_exports[tenant_name]
+
+    def get_partitions(self, tenant_name):
+        """Retrieves the `zoho.partitions.PartitionedWriter` of the passed tenant, creating it on first use.
+
+        Partitions are written directly into the tenant's partition root directory (shared by all crawls, with the
+        crawl's timestamp in every chunk file name), so require no splitting.
+
+        :param tenant_name: Name of the `zoho.tenants.Tenant`.
+        :type tenant_name: str
+        :return: Partitioned writer of the tenant.
+        :rtype: zoho.partitions.PartitionedWriter
+        """
+        exports = self.get_exports(tenant_name)
+        if exports.partitions is None:
+            settings = self.spider.settings
+            exports.partitions = PartitionedWriter(
+                output_dir=exports.tenant.partition_directory(settings.get('LOCAL_OUTPUT_DIRECTORY')),
+                field=settings.get('OUTPUT_PARTITION_FIELD'),
+                lines=settings.get('OUTPUT_LINES_PER_FILE'),
+                file_type=settings.get('OUTPUT_FILE_TYPE'),
+                run=self.spider.timestamp_concatenated)
+        return exports.partitions
+
+    def create_exporter(self, tenant_name, name, file_type='json'):
         """Create the exporter (and file) based on the passed `name` parameter, typically the `Module` being parsed.
 
+        :param tenant_name: Name of the `zoho.tenants.Tenant` the exporter belongs to.
+        :type tenant_name: str
         :param name: Zoho CRM `Module` `name` that is parsed (e.g. Contacts, Leads, etc).
         :type name: str
         :param file_type: The desired file extension (default: json).
@@ -60,107 +156,224 @@ class MultiRecordPipeline(object):
         :rtype: None
         """
         # Ensure exporter hasn't been generated
-        if self.is_exporter_active(name):
+        if self.is_exporter_active(tenant_name, name):
             return
 
-        # Create temporary directory for each file to avoid process lock
-        temp_dir = tempfile.TemporaryDirectory()
-        # Track for later retrieval when splitting
-        self.spider.temp_dirs.append(temp_dir)
-        file_name = os.path.join(temp_dir.name, name + '.' + file_type)
-        # Add to active files list
-        self.files[name] = open(file_name, 'w+b')
+        exports = self.get_exports(tenant_name)
+        # Add to active files list.  Small modules are held in memory, spooling to an anonymous temporary file
+        # (buffering whole pages, or more, per write) beyond `OUTPUT_SPOOL_MAX_SIZE`.
+        if self.spool_max_size:
+            exports.files[name] = tempfile.SpooledTemporaryFile(max_size=self.spool_max_size,
+                                                                mode='w+b',
+                                                                buffering=self.write_buffer_size)
+        else:
+            exports.files[name] = tempfile.TemporaryFile(mode='w+b', buffering=self.write_buffer_size)
         # create exporter
-        self.exporters[name] = JsonLinesItemExporter(self.files[name])
+        exports.exporters[name] = JsonLinesItemExporter(exports.files[name])
         # begin export
-        self.exporters[name].start_exporting()
+        exports.exporters[name].start_exporting()
 
-    def is_exporter_active(self, exporter):
+    def is_exporter_active(self, tenant_name, exporter):
         """Determines if the passed `exporter` name is already active (created), ensuring duplicates aren't created.
 
+        :param tenant_name: Name of the `zoho.tenants.Tenant` the exporter belongs to.
+        :type tenant_name: str
         :param exporter: Name of the exporter.
         :type exporter: str
         :return: Is the passed exporter name already in the active list.
         :rtype: bool
         """
-        return exporter in set(self.exporters.keys())
+        return exporter in self.get_exports(tenant_name).exporters
 
-    def is_file_active(self, file):
+    def is_file_active(self, tenant_name, file):
         """Determines if the passed `file` name is already active (created), ensuring duplicates aren't created.
 
+        :param tenant_name: Name of the `zoho.tenants.Tenant` the file belongs to.
+        :type tenant_name: str
         :param exporter: Name of the file.
         :type exporter: str
         :return: Is the passed file name already in the active list.
         :rtype: bool
         """
-        return file in set(self.files.values())
+        return file in set(self.get_exports(tenant_name).files.values())
 
     def process_item(self, item, spider):
         """Handles all processing of generated `zoho.items.Record` items (overriding `scrapy.Item`).
 
         Based on the `module` field passed along with the item, an exporter is created (if necessary), then the
-        exporter is called and the `.export_item` method initiates the export process.
+        exporter is called and the `.export_item` method initiates the export process.  If `OUTPUT_PARTITION_FIELD`
+        is set, the item is instead written to its date partition.  `zoho.items.RecordPage` items are handed to
+        `process_page`.
 
         :param item: The item containing all parsed data for this `Record`. Overrides `scrapy.Item`.
-        :type item: zoho.items.Record
+        :type item: zoho.items.Record or zoho.items.RecordPage
         :param spider: The `scrapy.Spider` which obtained this `Record`.
         :type spider: scrapy.Spider
         :return: As required by inheritence, the `zoho.items.Record` is returned after processing.
-        :rtype: zoho.items.Record
+        :rtype: zoho.items.Record or zoho.items.RecordPage
         """
+        if isinstance(item, RecordPage):
+            return self.process_page(item)
+
+        # Exporters are grouped by tenant, which is never exported
+        tenant_name = item['tenant']
+        del item['tenant']
+
         # Exporters are named after modules
         exporter_name = item['module']
 
         # Deleted item
         if len(item._values) <= 2 and item['id']:
             exporter_name += '-Deleted'
-        self.create_exporter(exporter_name, spider.settings.get('OUTPUT_FILE_TYPE'))
 
         # Remove module from export field unless setting requests it
-        if not spider.settings.get('ZOHO_INCLUDE_MODULE_NAME'):
+        if not self.include_module_name:
             del item['module']
 
-        if self.is_exporter_active(exporter_name):
-            # Call the base `export_item` method for parent exporter type
-            self.exporters[exporter_name].export_item(item)
+        if self.partition_field:
+            line = self.encoder.encode(dict(item)) + '\n'
+            self.get_partitions(tenant_name).write(exporter_name, item, line.encode())
+            return item
+
+        self.create_exporter(tenant_name, exporter_name, self.file_type)
+        # Call the base `export_item` method for parent exporter type
+        self.get_exports(tenant_name).exporters[exporter_name].export_item(item)
+        self.track_in_memory(tenant_name, exporter_name)
         return item
 
-    def split_files(self):
-        """Splits all downloaded files into smaller, iterative chunked files, if necessary.
+    def process_page(self, page):
+        """Exports a whole `zoho.items.RecordPage` at once.
 
-        Every temporary directory is looped, then all generated files within temp directories.  For each file found,
-        the `zoho.split_file.SplitFile` class is instanced, which handles actual splitting procedures.
+        All rows of the page are serialized in a single pass, then written with a single write to the module's
+        (buffered) file, or a single write per chunk file when `OUTPUT_PARTITION_FIELD` is set.
+
+        :param page: Page of rows from a single API call.
+        :type page: zoho.items.RecordPage
+        :return: The processed page.
+        :rtype: zoho.items.RecordPage
+        """
+        tenant_name = page['tenant']
+        module = page['module']
+        exporter_name = module + '-Deleted' if page['deleted'] else module
+        rows = page['records']
+        # Include module as the first export field if setting requests it
+        if self.include_module_name:
+            rows = [{'module': module, **row} for row in rows]
+
+        encode = self.encoder.encode
+        if self.partition_field:
+            self.get_partitions(tenant_name).write_page(exporter_name, rows,
+                                                        [(encode(row) + '\n').encode() for row in rows])
+            return page
+
+        self.create_exporter(tenant_name, exporter_name, self.file_type)
+        self.get_exports(tenant_name).files[exporter_name].write(''.join([encode(row) + '\n' for row in rows]).encode())
+        self.track_in_memory(tenant_name, exporter_name)
+        self.spool_if_near_budget()
+        return page
+
+    def track_in_memory(self, tenant_name, name):
+        """Updates the in-memory size of a module file after a write, then spools the largest in-memory files to disk
+        while the total exceeds `OUTPUT_SPOOL_TOTAL_MAX_SIZE`.
+
+        :param tenant_name: Name of the `zoho.tenants.Tenant` the file belongs to.
+        :type tenant_name: str
+        :param name: Name of the module file (exporter).
+        :type name: str
+        :return: Nothing
+        :rtype: None
+        """
+        key = (tenant_name, name)
+        if not self.spool_max_size or key in self.spooled:
+            return
+        size = self.tenant_exports[tenant_name].files[name].tell()
+        self.in_memory_size += size - self.in_memory.get(key, 0)
+        self.in_memory[key] = size
+        if size > self.spool_max_size:
+            # Rolled over to disk by the file itself
+            self.spool(key, rollover=False)
+        # Spool the largest in-memory files first, so as few files as possible are moved to disk
+        for key in sorted(self.in_memory, key=self.in_memory.get, reverse=True):
+            if not self.spool_total_max_size or self.in_memory_size <= self.spool_total_max_size:
+                break
+            self.spool(key)
+
+    def spool(self, key, rollover=True):
+        """Moves an in-memory module file to disk and stops tracking its size.
+
+        :param key: Tenant name and module file name.
+        :type key: tuple
+        :param rollover: Roll the file over to disk (optional, default: True -- Set to False if already on disk).
+        :type rollover: bool
+        :return: Nothing
+        :rtype: None
+        """
+        if rollover:
+            self.tenant_exports[key[0]].files[key[1]].rollover()
+        self.in_memory_size -= self.in_memory.pop(key, 0)
+        self.spooled.add(key)
+
+    def spool_if_near_budget(self):
+        """Moves all in-memory module files to disk if the spider's memory budget is near (see `ZOHO_MEMORY_BUDGET`).
+
+        :return: Nothing
+        :rtype: None
+        """
+        budget = getattr(self.spider, 'memory_budget', None)
+        if budget is None or not self.spool_max_size or not budget.is_near():
+            return
+        for tenant_name, exports in self.tenant_exports.items():
+            [self.spool((tenant_name, name)) for name in exports.files]
+
+    def split_files(self, exports):
+        """Splits all downloaded files of a tenant into smaller, iterative chunked files, if necessary.
+
+        Every (in-memory or temporary) module file is rewound and handed to the `zoho.split_file.SplitFile` class,
+        which handles actual splitting procedures, writing chunks straight to their final location.
 
         A timestamped directory is generated to house all split files, which is also placed inside the
-        `LOCAL_OUTPUT_DIRECTORY`, if specified.
+        `LOCAL_OUTPUT_DIRECTORY` (and the tenant's `output_prefix`), if specified.
 
+        :param exports: Exports of the tenant to split.
+        :type exports: TenantExports
         :return: Nothing
         :rtype: None
         """
-        # Loop through temporary directories
-        for temp_dir in self.spider.temp_dirs:
-            for root, dirs, files in os.walk(temp_dir.name):
-                # Loop through all files in each directory (to be safe, though should be one file per)
-                for file_path in files:
-                    file_name, extension = os.path.splitext(os.path.basename(file_path))
-                    # Split file into smaller chunks
-                    SplitFile(path=os.path.join(root, file_path),
-                              lines=self.spider.settings.get('OUTPUT_LINES_PER_FILE'),
-                              dest_dir=os.path.join(self.spider.settings.get('LOCAL_OUTPUT_DIRECTORY'),
-                                                    self.spider.timestamp_concatenated,
-                                                    file_name))
+        output_dir = exports.tenant.output_directory(self.spider.settings.get('LOCAL_OUTPUT_DIRECTORY'),
+                                                     self.spider.timestamp_concatenated)
+        for name, file in exports.files.items():
+            file.seek(0)
+            # Split file into smaller chunks
+            SplitFile(path=name + '.' + self.file_type,
+                      lines=self.spider.settings.get('OUTPUT_LINES_PER_FILE'),
+                      dest_dir=os.path.join(output_dir, name),
+                      source=file)
 
     def upload_files(self):
-        """Instantiates the `zoho.zoho_s3.ZohoS3` class and attempts to upload all files in output directory.
+        """Instantiates the `zoho.zoho_s3.ZohoS3` class and attempts to upload all files in each tenant's output
+        directory to the tenant's bucket.  A single `ZohoS3` (and its transfer manager) is shared by all tenants.
+
+        `zoho.zoho_s3` (and therefore `boto3`) is imported here rather than at module level, so that loading the
+        pipeline doesn't pay for the AWS SDK until an upload actually happens.
 
         :return: Nothing
         :rtype: None
         """
+        if not self.tenant_exports:
+            return
+        from zoho.zoho_s3 import ZohoS3
+
         # Initialize S3
-        zoho_s3 = ZohoS3(self.spider)
+        zoho_s3 = ZohoS3(self.spider.settings)
         # Upload files
-        for root, dirs, files in os.walk(os.path.join(self.spider.settings.get('LOCAL_OUTPUT_DIRECTORY'),
-                                                      self.spider.timestamp_concatenated)):
-            for file_path in files:
-                zoho_s3.upload(os.path.join(root, file_path),
-                               os.path.join(root, file_path))
+        output_dir = self.spider.settings.get('LOCAL_OUTPUT_DIRECTORY')
+        for exports in self.tenant_exports.values():
+            if exports.partitions is not None:
+                # Only this crawl's chunks within the shared partition root
+                zoho_s3.upload_directory(exports.tenant.partition_directory(output_dir),
+                                         exports.tenant.bucket_name,
+                                         run=self.spider.timestamp_concatenated)
+            else:
+                zoho_s3.upload_directory(exports.tenant.output_directory(output_dir,
+                                                                         self.spider.timestamp_concatenated),
+                                         exports.tenant.bucket_name)
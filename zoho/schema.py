@@ -0,0 +1,151 @@
+import collections
+import datetime
+
+# Values Zoho CRM returns for fields without a value
+NULL_VALUES = frozenset(['', 'null'])
+
+
+def to_bool(value):
+    """Converts a Zoho CRM `Boolean` value ('true' or 'false').
+
+    :param value: Raw value.
+    :type value: str
+    :return: Converted value.
+    :rtype: bool
+    :raises ValueError: If `value` isn't a boolean.
+    """
+    lowered = value.lower()
+    if lowered not in ('true', 'false'):
+        raise ValueError('Invalid boolean: {0}'.format(value))
+    return lowered == 'true'
+
+
+def to_date(value):
+    """Validates a Zoho CRM `Date` value, returning it in ISO 8601 format.
+
+    :param value: Raw value (`YYYY-MM-DD`).
+    :type value: str
+    :return: Converted value.
+    :rtype: str
+    :raises ValueError: If `value` isn't a date.
+    """
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+
+
+def to_datetime(value):
+    """Validates a Zoho CRM `DateTime` value, returning it in ISO 8601 format.
+
+    :param value: Raw value (`YYYY-MM-DD HH:MM:SS`).
+    :type value: str
+    :return: Converted value.
+    :rtype: str
+    :raises ValueError: If `value` isn't a date and time.
+    """
+    return datetime.datetime.strptime(value, '%Y-%m-%d %H:%M:%S').isoformat()
+
+
+# Converters per Zoho CRM field `type`.  Types not listed (Text, Email, Lookup, Pick List, etc) remain strings.
+TYPE_CONVERTERS = {
+    'Boolean': to_bool,
+    'Currency': float,
+    'Date': to_date,
+    'DateTime': to_datetime,
+    'Decimal': float,
+    'Double': float,
+    'Integer': int,
+    'Long Integer': int,
+    'Percent': float,
+}
+
+
+def as_list(value):
+    """Normalizes Zoho CRM JSON values which are a single object when there is one entry and a list otherwise.
+
+    :param value: Object or list of objects.
+    :type value: dict or list
+    :return: List of objects.
+    :rtype: list
+    """
+    return value if isinstance(value, list) else [value]
+
+
+class SchemaRegistry:
+    """Caches the field types of each `Module`, built from the Zoho CRM getFields API, and converts exported values
+    to those types.
+
+    Conversion failures don't fail the page: the raw value is kept and the failure is counted per `Module`.
+    """
+
+    def __init__(self):
+        """Initializes the `SchemaRegistry` class."""
+        # Conversion failures per (tenant name, module)
+        self.errors = collections.Counter()
+        # Converter per field name, per (tenant name, module)
+        self.schemas = dict()
+
+    def coerce_page(self, tenant_name, module, rows):
+        """Converts the values of a page of rows in place, one field at a time across the page.
+
+        :param tenant_name: Name of the `zoho.tenants.Tenant` the rows belong to.
+        :type tenant_name: str
+        :param module: Zoho CRM Module name (e.g. Contacts, Leads, etc).
+        :type module: str
+        :param rows: Rows of field name and raw (string) value pairs.
+        :type rows: list
+        :return: Number of values that could not be converted.
+        :rtype: int
+        """
+        errors = 0
+        for field, convert in self.schemas.get((tenant_name, module), {}).items():
+            for row in rows:
+                value = row.get(field)
+                if not isinstance(value, str):
+                    continue
+                if value in NULL_VALUES:
+                    row[field] = None
+                    continue
+                try:
+                    row[field] = convert(value)
+                except (TypeError, ValueError):
+                    errors += 1
+        if errors:
+            self.errors[(tenant_name, module)] += errors
+        return errors
+
+    def has_schema(self, tenant_name, module):
+        """Determines if the schema of `module` is already registered.
+
+        :param tenant_name: Name of the `zoho.tenants.Tenant` the module belongs to.
+        :type tenant_name: str
+        :param module: Zoho CRM Module name (e.g. Contacts, Leads, etc).
+        :type module: str
+        :return: Is the schema registered.
+        :rtype: bool
+        """
+        return (tenant_name, module) in self.schemas
+
+    def register(self, tenant_name, module, json_data):
+        """Registers the schema of `module` from a deserialized getFields API response.
+
+        :param tenant_name: Name of the `zoho.tenants.Tenant` the module belongs to.
+        :type tenant_name: str
+        :param module: Zoho CRM Module name (e.g. Contacts, Leads, etc).
+        :type module: str
+        :param json_data: Deserialized getFields response, or None if unavailable (all values remain strings).
+        :type json_data: dict or None
+        :return: Converter per field name.
+        :rtype: dict
+        """
+        schema = dict()
+        try:
+            sections = as_list(json_data[module]['section'])
+        except (KeyError, TypeError):
+            sections = []
+        for section in sections:
+            for field in as_list(section.get('FL', [])):
+                name = field.get('label') or field.get('dv')
+                convert = TYPE_CONVERTERS.get(field.get('type'))
+                if name and convert:
+                    schema[name] = convert
+        self.schemas[(tenant_name, module)] = schema
+        return schema
@@ -31,25 +31,67 @@ OUTPUT_FILE_TYPE = 'json'
 # Number of lines (maximum) per generated file before a new file is created and uploaded.  (default: 1000)
 OUTPUT_LINES_PER_FILE = 1000
 
+# Size in bytes up to which each module's export is held in memory before spooling to a temporary file on disk
+# (default: 4 MiB).  Set to None or 0 to always use temporary files.
+OUTPUT_SPOOL_MAX_SIZE = 4 * 1024 * 1024
+# Size in bytes up to which the exports of all modules (and tenants) are held in memory in total (default: 64 MiB).
+# Beyond it, the largest in-memory exports are spooled to temporary files first.
+OUTPUT_SPOOL_TOTAL_MAX_SIZE = 64 * 1024 * 1024
+
+# Write buffer size in bytes for export files, so each page of records is written at once (default: 1 MiB).
+OUTPUT_WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Date field to partition output by (default: None -- Output per module).  When set, e.g. 'Modified Time', records are
+# written to Hive-style 'module=<Module>/dt=<YYYY-MM-DD>' directories shared by all crawls, directly within
+# LOCAL_OUTPUT_DIRECTORY (and the tenant's output prefix), instead, with the crawl timestamp in every file name.
+OUTPUT_PARTITION_FIELD = None
+
 # S3 Transfer Config -- See: http://boto3.readthedocs.io/en/latest/_modules/boto3/s3/transfer.html
 S3_NUM_DOWNLOAD_ATTEMPTS = 10
 S3_MAX_CONCURRENCY = 10
 S3_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
 S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
 
+# Store uploaded file content once under content-addressed `objects/<md5>` keys, referenced by each run's
+# `manifest.json`, rather than under the timestamped directory (default: False).
+S3_CONTENT_ADDRESSED = False
+
 # Zoho CRM authentication token.  Can be specified directly as a string or indirectly as environmental variable.
 ZOHO_CRM_AUTH_TOKEN = os.getenv('ZOHO_CRM_AUTH_TOKEN')
 
 # Creates an additional extra export 'module' and value of the Zoho CRM Module (default: False).
 ZOHO_INCLUDE_MODULE_NAME = False
 
+# Export typed values, converted according to each module's field types from the getFields API, rather than strings
+# (default: False).  Numbers and booleans are exported as JSON numbers and booleans, dates and times as ISO 8601
+# strings and empty values as null.  Values that cannot be converted are exported unchanged and counted.
+ZOHO_TYPED_OUTPUT = False
+
 # API requests will only retrieve data created or modified after this time (default: None -- Returns all records)
 # STRING FORMAT: '{:%Y-%m-%d %H:%M:%S}'.format(datetime.datetime.now()) e.g. '2016-07-11 00:00:00'
 ZOHO_LAST_MODIFIED_TIME = None
 
+# Memory budget for the crawl in megabytes, on top of the memory in use at startup (default: None -- Unbounded).  When
+# set, modules are queued and crawled a few at a time with one page in flight per module, module files move to disk as
+# the budget nears, and responses awaiting parsing are limited to a quarter of the budget.  At least 64 is recommended.
+ZOHO_MEMORY_BUDGET = None
+
 # Max requested records per `Module` (default: None -- Returns all records)
 ZOHO_MAX_RECORDS_PER_MODULE = 750
 
+# Failures (download attempts, including Scrapy's retries, or API errors) after which a `Module` is given up on,
+# skipping its remaining pages and API methods (default: 3).  Until then, failed pages are retried within the module's
+# pagination chain.  None to never give up, in which case a failed page ends its chain without being retried.
+ZOHO_MODULE_ERROR_LIMIT = 3
+
+# Zoho CRM orgs (tenants) to crawl in one process, sharing HTTP connections and the S3 transfer manager
+# (default: None -- Single org using the settings above).  Each tenant is a dict with a unique 'name' and optionally
+# 'auth_token', 'bucket_name' and 'max_records' (overriding ZOHO_CRM_AUTH_TOKEN, AWS_BUCKET_NAME and
+# ZOHO_MAX_RECORDS_PER_MODULE), 'output_prefix' (directory and S3 key prefix for its exports) and 'max_requests'
+# (API request quota for the crawl, which disables Scrapy's retries for the tenant).
+# e.g. [{'name': 'acme', 'auth_token': os.getenv('ACME_AUTH_TOKEN'), 'output_prefix': 'acme', 'max_requests': 5000}]
+ZOHO_TENANTS = None
+
 # Determines which modules should be parsed (Default: None or 'ALL' -- Returns all records for all valid modules)
 ZOHO_MODULE_WHITELIST = ['Contacts', 'Leads']
 # ---------------------
@@ -131,8 +173,14 @@ ITEM_PIPELINES = {
 
 # Enable and configure HTTP caching (disabled by default)
 # See http://scrapy.readthedocs.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
+# Recorded Zoho CRM API responses are compressed, keyed by tenant, module, method, lastModifiedTime and fromIndex
+# (never the auth token), and can be replayed offline with HTTPCACHE_IGNORE_MISSING (see `zoho-extract crawl`).
 #HTTPCACHE_ENABLED = True
 #HTTPCACHE_EXPIRATION_SECS = 0
-#HTTPCACHE_DIR = 'httpcache'
+HTTPCACHE_DIR = 'httpcache'
 #HTTPCACHE_IGNORE_HTTP_CODES = []
-#HTTPCACHE_STORAGE = 'scrapy.extensions.httpcache.FilesystemCacheStorage'
+#HTTPCACHE_IGNORE_MISSING = True
+HTTPCACHE_STORAGE = 'zoho.httpcache.ZohoCacheStorage'
+# Maximum size of the HTTP cache in megabytes, beyond which least recently used responses are evicted
+# (default: None -- Unlimited).
+ZOHO_HTTPCACHE_MAX_SIZE = None
@@ -1,10 +1,14 @@
+import collections
 import datetime
 import json
 import logging
 import scrapy
 from urllib.parse import urlencode
 
-from zoho.items import Record
+from zoho.items import Record, RecordPage
+from zoho.memory import MemoryBudget, current_rss
+from zoho.schema import SchemaRegistry, as_list
+from zoho.tenants import Tenant
 
 
 class ZohoSpider(scrapy.Spider):
@@ -19,12 +23,11 @@ class ZohoSpider(scrapy.Spider):
     ZOHO_BASE_RECORDS_URL = "https://crm.zoho.com/crm/private/json/{module}/{method}?{params}"
     INITIAL_FROM_INDEX = 1
     MAX_RECORD_COUNT = 200
+    # API methods crawled for every module, in order when a memory budget is active
+    CHAIN_METHODS = ('getRecords', 'getDeletedRecordIds')
 
     allowed_domains = ["zoho.com"]
-    json_data = None
     name = "zoho"
-    response = None
-    temp_dirs = list()
 
     def __init__(self, *args, **kwargs):
         """Initializes `ZohoSpider`.
@@ -38,7 +41,22 @@ class ZohoSpider(scrapy.Spider):
         # Set starting timestamp
         self.timestamp = '{:%Y-%m-%d %H:%M:%S}'.format(datetime.datetime.now())
         self.timestamp_concatenated = '{:%Y-%m-%d_%H-%M-%S}'.format(datetime.datetime.now())
-        self.start_urls = [self.get_modules_url()]
+        # Zoho CRM orgs to crawl, by name (see `ZOHO_TENANTS`)
+        self.tenants = dict((tenant.name, tenant) for tenant in Tenant.from_settings(self.settings))
+        # Field types per module (see `ZOHO_TYPED_OUTPUT`)
+        self.schemas = SchemaRegistry() if self.settings.get('ZOHO_TYPED_OUTPUT') else None
+        # Feed exports (see `FEEDS`) expect an item per record, rather than per page
+        self.record_items = bool(self.settings.getdict('FEEDS') or self.settings.get('FEED_URI'))
+        # Failed pages per (tenant name, module) (see `ZOHO_MODULE_ERROR_LIMIT`)
+        self.module_errors = collections.Counter()
+        # Memory budget mode (see `ZOHO_MEMORY_BUDGET`)
+        self.active_modules = set()
+        self.memory_budget = None
+        self.pending_modules = None
+        if self.settings.get('ZOHO_MEMORY_BUDGET'):
+            self.memory_budget = MemoryBudget(self.settings.get('ZOHO_MEMORY_BUDGET'))
+            # Queued module names per tenant name: a few bytes each, so the queues never need to spill to disk
+            self.pending_modules = collections.OrderedDict()
 
     # Override from_crawler to properly pass Settings instance for use during __init__
     @classmethod
@@ -51,23 +69,88 @@ class ZohoSpider(scrapy.Spider):
         :rtype: scrapy.Spider
         """
         settings = crawler.settings
-        return cls(settings=settings)
+        spider = cls(settings=settings)
+        spider._set_crawler(crawler)
+        return spider
+
+    @classmethod
+    def update_settings(cls, settings):
+        """Overrides `update_settings` to apply Scrapy settings implied by `ZOHO_MEMORY_BUDGET` (if set).
+
+        Limits the bytes of downloaded responses awaiting parsing to a quarter of the budget, and warns when the
+        budget itself is exceeded (on top of the memory already in use at startup).
+
+        :param settings: Settings prior to being frozen for the crawl.
+        :type settings: scrapy.settings.Settings
+        :return: Nothing
+        :rtype: None
+        """
+        super(ZohoSpider, cls).update_settings(settings)
+        budget = settings.get('ZOHO_MEMORY_BUDGET')
+        if budget:
+            settings.set('SCRAPER_SLOT_MAX_ACTIVE_SIZE', budget * 1024 * 1024 // 4, priority='spider')
+            settings.set('MEMUSAGE_ENABLED', True, priority='spider')
+            settings.set('MEMUSAGE_WARNING_MB', current_rss() // (1024 * 1024) + budget, priority='spider')
+
+    async def start(self):
+        """Overrides `scrapy.Spider` (Scrapy 2.13+) to request the `Modules` of every tenant via `start_requests`.
+
+        :return: getModules request for each tenant.
+        :rtype: async_generator
+        """
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        """Overrides `scrapy.Spider` (prior to Scrapy 2.13) to request the `Modules` of every tenant.
+
+        :return: getModules request for each tenant.
+        :rtype: generator
+        """
+        for tenant in self.tenants.values():
+            if not tenant.has_quota():
+                continue
+            tenant.request_count += 1
+            yield scrapy.Request(self.get_modules_url(tenant),
+                                 meta={'tenant': tenant.name,
+                                       'dont_retry': tenant.max_requests is not None},
+                                 dont_filter=True)
 
     # Get modules formatted URL.
-    def get_modules_url(self):
+    def get_modules_url(self, tenant):
         """Constructs the formatted URL for the Zoho CRM Modules API call.
 
+        :param tenant: Zoho CRM org to request.
+        :type tenant: zoho.tenants.Tenant
         :return: Full, authenticated URL for getModules Zoho API.
         :rtype: str
         """
-        params = {'authtoken': self.settings.get('ZOHO_CRM_AUTH_TOKEN'),
+        params = {'authtoken': tenant.auth_token,
                   'scope': 'crmapi'}
         return self.ZOHO_BASE_MODULES_URL.format(params=urlencode(params))
 
+    def get_fields_url(self, tenant, module):
+        """Constructs the formatted URL for the Zoho CRM getFields API call.
+
+        :param tenant: Zoho CRM org to request.
+        :type tenant: zoho.tenants.Tenant
+        :param module: Zoho CRM Module name (e.g. Contacts, Leads, etc).
+        :type module: str
+        :return: Full, authenticated URL for the getFields Zoho API request.
+        :rtype: str
+        """
+        params = {'authtoken': tenant.auth_token,
+                  'scope': 'crmapi'}
+        return self.ZOHO_BASE_RECORDS_URL.format(module=module,
+                                                 method='getFields',
+                                                 params=urlencode(params))
+
     # Get records formatted URL with pagination.
-    def get_records_url(self, module, from_index, method='getRecords'):
+    def get_records_url(self, tenant, module, from_index, method='getRecords'):
         """Constructs the formatted URL for the Zoho CRM getRecords and getDeletedRecordIds API calls.
 
+        :param tenant: Zoho CRM org to request.
+        :type tenant: zoho.tenants.Tenant
         :param module: Zoho CRM Module name (e.g. Contacts, Leads, etc).
         :type module: str
         :param from_index: Initial record index to retrieve with this URL instance.
@@ -77,20 +160,24 @@ class ZohoSpider(scrapy.Spider):
         :return: Full, authenticated URL for the appropriate getRecords or getDeletedRecordIds Zoho API request.
         :rtype: str
         """
-        params = {'authtoken': self.settings.get('ZOHO_CRM_AUTH_TOKEN'),
+        params = {'authtoken': tenant.auth_token,
                   'scope': 'crmapi',
                   'fromIndex': from_index,
-                  'toIndex': self.to_index(from_index)}
+                  'toIndex': self.to_index(from_index, tenant.max_records)}
         if self.settings.get('ZOHO_LAST_MODIFIED_TIME'):
             params['lastModifiedTime'] = self.settings.get('ZOHO_LAST_MODIFIED_TIME')
         return self.ZOHO_BASE_RECORDS_URL.format(module=module,
                                                  method=method,
                                                  params=urlencode(params))
 
-    #
-    def has_data(self, data_type='record'):
+    @staticmethod
+    def has_data(json_data, url, data_type='record'):
         """Determine if API response has indicated that data present or missing (empty DB table or query).
 
+        :param json_data: Deserialized API response.
+        :type json_data: dict
+        :param url: URL of the API response, for logging.
+        :type url: str
         :param data_type: Type of data object API call to examine (e.g. getRecords vs getDeletedRecordIds).
         :type data_type: str
         :return: Indicates whether data from API call present.
@@ -98,35 +185,40 @@ class ZohoSpider(scrapy.Spider):
         """
         if data_type == 'record':
             try:
-                self.json_data['response']['nodata']
+                json_data['response']['nodata']
             except KeyError:
                 return True
             else:
-                logging.debug('No data was found matching query, url: {0}.'.format(self.response.url))
+                logging.debug('No data was found matching query, url: {0}.'.format(url))
                 return False
         elif data_type == 'deleted_record':
             try:
-                if type(self.json_data['response']['result']['DeletedIDs']) is bool and self.json_data['response']['result']['DeletedIDs']:
+                if type(json_data['response']['result']['DeletedIDs']) is bool and json_data['response']['result']['DeletedIDs']:
                     return False
             except KeyError:
-                logging.debug('No data was found matching query, url: {0}.'.format(self.response.url))
+                logging.debug('No data was found matching query, url: {0}.'.format(url))
                 return False
             else:
                 return True
 
-    def is_json_valid(self):
+    @staticmethod
+    def is_json_valid(json_data, url):
         """Determine if API response indicated if JSON was valid or an error occurred.
 
+        :param json_data: Deserialized API response.
+        :type json_data: dict
+        :param url: URL of the API response, for logging.
+        :type url: str
         :return: Is response JSON is valid or not.
         :rtype: bool
         """
         # Error in response
         try:
-            self.json_data['response']['error']
+            json_data['response']['error']
         except KeyError:
             return True
         else:
-            logging.debug('JSON is invalid, url: {0}.'.format(self.response.url))
+            logging.debug('JSON is invalid, url: {0}.'.format(url))
             return False
 
     @staticmethod
@@ -174,32 +266,409 @@ class ZohoSpider(scrapy.Spider):
         """Primary parse method to retrieve Zoho CRM `Module` data.
 
         Overrides `scrapy.Spider`.  Uses the full list of obtained `Module` names and for each, generates
-        `scrapy.Request` objects for both the getRecords and getDeletedRecordIds API calls.
+        `scrapy.Request` objects for both the getRecords and getDeletedRecordIds API calls.  When a memory budget is
+        active, modules are queued instead and crawled a few at a time (see `start_chains`).
 
         :param response: Response object obtained from scrapy's `Request`.
         :type response: scrapy.http.response.Response
         :return: Typically a new `scrapy.Request` that parses for `Records` or `DeletedRecords`.
         :rtype: `scrapy.Request` or None
         """
-        self.response = response
+        tenant = self.tenants[response.meta['tenant']]
         data = json.loads(response.body.decode())
 
-        for row in data['response']['result']['row']:
+        for row in as_list(data['response']['result']['row']):
             module = row['content']
             # Ensure module is on approved whitelist
             if self.is_module_allowed(module):
-                # Get deleted records for module
-                deleted_records_url = self.get_records_url(module, self.INITIAL_FROM_INDEX, 'getDeletedRecordIds')
-                yield scrapy.Request(deleted_records_url,
-                                     meta={'module': module,
-                                           'from_index': self.INITIAL_FROM_INDEX},
-                                     callback=self.get_deleted_records)
-                # Get record content for module
-                records_url = self.get_records_url(module, self.INITIAL_FROM_INDEX)
-                yield scrapy.Request(records_url,
-                                     meta={'module': module,
-                                           'from_index': self.INITIAL_FROM_INDEX},
-                                     callback=self.get_records)
+                if self.pending_modules is not None:
+                    # Queue module until an active module finishes
+                    self.pending_modules.setdefault(tenant.name, collections.deque()).append(module)
+                    continue
+                # Get deleted records, then record content, for module (within the tenant's quota)
+                requests = [self.get_page_request(tenant, module, self.INITIAL_FROM_INDEX, 'getDeletedRecordIds'),
+                            self.get_first_request(tenant, module)]
+                yield from (request for request in requests if request is not None)
+                if not tenant.has_quota():
+                    break
+
+        yield from self.start_chains()
+
+    def get_first_request(self, tenant, module, method='getRecords'):
+        """Generates the `scrapy.Request` starting a module's pagination chain for `method`.
+
+        With `ZOHO_TYPED_OUTPUT`, getRecords chains start by requesting the module's fields, unless its schema is
+        already registered.
+
+        :param tenant: Zoho CRM org to request.
+        :type tenant: zoho.tenants.Tenant
+        :param module: Zoho CRM Module name (e.g. Contacts, Leads, etc).
+        :type module: str
+        :param method: Which API method to request (getRecords vs getDeletedRecordIds).
+        :type method: str
+        :return: Request parsed by `get_fields`, `get_records` or `get_deleted_records`, or None if the tenant's
+            request quota is exhausted.
+        :rtype: scrapy.Request or None
+        """
+        if method == 'getRecords' and self.schemas is not None and not self.schemas.has_schema(tenant.name, module):
+            if not tenant.has_quota():
+                return None
+            tenant.request_count += 1
+            return scrapy.Request(self.get_fields_url(tenant, module),
+                                  meta={'tenant': tenant.name,
+                                        'module': module,
+                                        'method': method,
+                                        'dont_retry': tenant.max_requests is not None},
+                                  callback=self.get_fields,
+                                  errback=self.fields_failed,
+                                  priority=-tenant.request_count)
+        return self.get_page_request(tenant, module, self.INITIAL_FROM_INDEX, method)
+
+    def get_page_request(self, tenant, module, from_index, method='getRecords', dont_filter=False):
+        """Generates the `scrapy.Request` for a single page of getRecords or getDeletedRecordIds results.
+
+        Requests are prioritized by how many requests their tenant has already issued, so tenants take turns
+        regardless of how many modules each one has, preventing a single huge org from starving the others.
+
+        :param tenant: Zoho CRM org to request.
+        :type tenant: zoho.tenants.Tenant
+        :param module: Zoho CRM Module name (e.g. Contacts, Leads, etc).
+        :type module: str
+        :param from_index: Initial record index to retrieve with this request.
+        :type from_index: int
+        :param method: Which API method to request (getRecords vs getDeletedRecordIds).
+        :type method: str
+        :param dont_filter: Bypass the duplicate filter, e.g. to retry a failed page (optional, default: False).
+        :type dont_filter: bool
+        :return: Request parsed by `get_records` or `get_deleted_records`, or None if the tenant's request quota is
+            exhausted.
+        :rtype: scrapy.Request or None
+        """
+        if not tenant.has_quota():
+            return None
+        tenant.request_count += 1
+        # Scrapy's retries would bypass the quota, so pages of tenants with a quota are only retried by `retry_page`
+        callback = self.get_deleted_records if method == 'getDeletedRecordIds' else self.get_records
+        return scrapy.Request(self.get_records_url(tenant, module, from_index, method),
+                              meta={'tenant': tenant.name,
+                                    'module': module,
+                                    'from_index': from_index,
+                                    'method': method,
+                                    'dont_retry': tenant.max_requests is not None},
+                              callback=callback,
+                              errback=self.page_failed,
+                              priority=-tenant.request_count,
+                              dont_filter=dont_filter)
+
+    def start_chains(self):
+        """Starts crawling queued modules until `CONCURRENT_REQUESTS` modules are active (memory budget mode only).
+
+        Each active module crawls one API method at a time (see `CHAIN_METHODS`), so at most one page per module is
+        ever in flight.  Tenants take turns: each free slot goes to the tenant with the fewest active modules, so a
+        tenant with many modules never holds every slot while others wait.
+
+        :return: Requests for the first page of each newly activated module.
+        :rtype: generator
+        """
+        if self.pending_modules is None:
+            return
+        max_active = self.settings.getint('CONCURRENT_REQUESTS', 16)
+        while self.pending_modules and len(self.active_modules) < max_active:
+            active = collections.Counter(tenant_name for tenant_name, module in self.active_modules)
+            # Ties go to the tenant queued first, which moves to the back of the queue once it takes its turn
+            tenant_name = min(self.pending_modules, key=lambda name: active[name])
+            modules = self.pending_modules.pop(tenant_name)
+            module = modules.popleft()
+            if modules:
+                self.pending_modules[tenant_name] = modules
+            request = self.get_first_request(self.tenants[tenant_name], module, self.CHAIN_METHODS[0])
+            if request is not None:
+                self.active_modules.add((tenant_name, module))
+                yield request
+
+    def finish_chain(self, tenant, module, method):
+        """Handles the end of a module's pagination chain for `method` (memory budget mode only).
+
+        Continues with the module's next API method, or releases the module and starts queued modules.
+
+        :param tenant: Zoho CRM org of the module.
+        :type tenant: zoho.tenants.Tenant
+        :param module: Zoho CRM Module name (e.g. Contacts, Leads, etc).
+        :type module: str
+        :param method: API method whose chain has ended.
+        :type method: str
+        :return: Request(s) continuing the crawl.
+        :rtype: generator
+        """
+        if self.pending_modules is None:
+            return
+        next_method_index = self.CHAIN_METHODS.index(method) + 1
+        if next_method_index < len(self.CHAIN_METHODS) and self.is_module_abandoned(tenant, module):
+            self.inc_stat('zoho/pagination/avoided_requests')
+        elif next_method_index < len(self.CHAIN_METHODS):
+            request = self.get_first_request(tenant, module, self.CHAIN_METHODS[next_method_index])
+            if request is not None:
+                yield request
+                return
+        self.active_modules.discard((tenant.name, module))
+        yield from self.start_chains()
+
+    def continue_chain(self, response, results):
+        """Passes along all `results` of a page, calling `finish_chain` if no request for a further page was among them.
+
+        The chain is also finished if parsing the page raises, so the module's slot is released for queued modules
+        before the error is passed on to Scrapy.
+
+        :param response: Response object obtained from scrapy's `Request`.
+        :type response: scrapy.http.response.Response
+        :param results: Record pages and requests generated from `response`.
+        :type results: generator
+        :return: `results`, followed by any requests from `finish_chain`.
+        :rtype: generator
+        """
+        continued = False
+        try:
+            for result in results:
+                continued = continued or isinstance(result, scrapy.Request)
+                yield result
+        except Exception:
+            if not continued:
+                yield from self.finish_chain(self.tenants[response.meta['tenant']],
+                                             response.meta['module'],
+                                             response.meta['method'])
+            raise
+        if not continued:
+            yield from self.finish_chain(self.tenants[response.meta['tenant']],
+                                         response.meta['module'],
+                                         response.meta['method'])
+
+    def page_failed(self, failure):
+        """Errback for page requests that could not be downloaded, retrying the page within the module's chain (see
+        `retry_page`) or otherwise ending the chain for that method.
+
+        Every download attempt counts as a failure of the module, including those already retried by Scrapy's
+        `RetryMiddleware`.
+
+        :param failure: Failure raised while processing the request.
+        :type failure: twisted.python.failure.Failure
+        :return: Request(s) continuing the crawl.
+        :rtype: generator
+        """
+        request = failure.request
+        logging.error('Request failed ({0}), url: {1}.'.format(failure.getErrorMessage(), request.url))
+        tenant = self.tenants[request.meta['tenant']]
+        self.module_failed(tenant, request.meta['module'], request.meta.get('retry_times', 0) + 1)
+        retry = self.retry_page(tenant, request.meta['module'], request.meta['from_index'], request.meta['method'])
+        if retry is not None:
+            yield retry
+            return
+        yield from self.finish_chain(tenant, request.meta['module'], request.meta['method'])
+
+    def retry_page(self, tenant, module, from_index, method='getRecords'):
+        """Generates the request retrying a failed page, until `module` reaches `ZOHO_MODULE_ERROR_LIMIT`.
+
+        Retrying within the chain keeps the module's pagination going, so its failures add up towards the limit rather
+        than each failed page silently ending the chain.  Failed pages are not retried without a limit.
+
+        :param tenant: Zoho CRM org to request.
+        :type tenant: zoho.tenants.Tenant
+        :param module: Zoho CRM Module name (e.g. Contacts, Leads, etc).
+        :type module: str
+        :param from_index: Initial record index of the failed page.
+        :type from_index: int
+        :param method: Which API method to request (getRecords vs getDeletedRecordIds).
+        :type method: str
+        :return: Request for the failed page, or None if the chain has ended.
+        :rtype: scrapy.Request or None
+        """
+        if not self.settings.get('ZOHO_MODULE_ERROR_LIMIT') or self.is_module_abandoned(tenant, module):
+            return None
+        logging.debug('Retrying page, tenant: {0}, module: {1}, from index: {2}.'.format(tenant.name, module,
+                                                                                          from_index))
+        # None if tenant's request quota is exhausted
+        return self.get_page_request(tenant, module, from_index, method, dont_filter=True)
+
+    def module_failed(self, tenant, module, count=1):
+        """Counts failed pages of `module`, giving up on the module once `ZOHO_MODULE_ERROR_LIMIT` is reached.
+
+        :param tenant: Zoho CRM org of the module.
+        :type tenant: zoho.tenants.Tenant
+        :param module: Zoho CRM Module name (e.g. Contacts, Leads, etc).
+        :type module: str
+        :param count: Number of failures (optional, default: 1).
+        :type count: int
+        :return: Nothing
+        :rtype: None
+        """
+        previous = self.module_errors[(tenant.name, module)]
+        self.module_errors[(tenant.name, module)] += count
+        limit = self.settings.get('ZOHO_MODULE_ERROR_LIMIT')
+        if limit and previous < limit <= self.module_errors[(tenant.name, module)]:
+            logging.warning('Giving up on module after {0} failed page(s), tenant: {1}, module: {2}.'.format(
+                limit, tenant.name, module))
+            self.inc_stat('zoho/pagination/abandoned_modules')
+
+    def page_error(self, response):
+        """Counts a page `response` that could not be parsed (e.g. a Zoho CRM API error) as a failure of its module, and
+        retries the page (see `retry_page`).
+
+        :param response: Response object obtained from scrapy's `Request`.
+        :type response: scrapy.http.response.Response
+        :return: Request for the failed page, if it is retried.
+        :rtype: generator
+        """
+        tenant = self.tenants[response.meta['tenant']]
+        self.module_failed(tenant, response.meta['module'])
+        retry = self.retry_page(tenant, response.meta['module'], response.meta['from_index'], response.meta['method'])
+        if retry is not None:
+            yield retry
+
+    def is_module_abandoned(self, tenant, module):
+        """Determines if `module` failed too often to be crawled any further (see `ZOHO_MODULE_ERROR_LIMIT`).
+
+        :param tenant: Zoho CRM org of the module.
+        :type tenant: zoho.tenants.Tenant
+        :param module: Zoho CRM Module name (e.g. Contacts, Leads, etc).
+        :type module: str
+        :return: Has the module been given up on.
+        :rtype: bool
+        """
+        limit = self.settings.get('ZOHO_MODULE_ERROR_LIMIT')
+        return bool(limit) and self.module_errors[(tenant.name, module)] >= limit
+
+    def inc_stat(self, key, count=1):
+        """Increments crawl stat `key`, if the spider is attached to a crawler.
+
+        :param key: Stat name.
+        :type key: str
+        :param count: Increment (optional, default: 1).
+        :type count: int
+        :return: Nothing
+        :rtype: None
+        """
+        if getattr(self, 'crawler', None) is not None:
+            self.crawler.stats.inc_value(key, count)
+
+    def get_next_page_request(self, tenant, module, from_index, count, method='getRecords'):
+        """Generates the request for the page following a parsed page of `count` results, if another page may exist.
+
+        A page with fewer results than requested is the last one, so the request that would only return `nodata` is
+        skipped and counted in the `zoho/pagination/avoided_requests` stat, as are further pages of abandoned modules.
+
+        :param tenant: Zoho CRM org to request.
+        :type tenant: zoho.tenants.Tenant
+        :param module: Zoho CRM Module name (e.g. Contacts, Leads, etc).
+        :type module: str
+        :param from_index: Initial record index of the parsed page.
+        :type from_index: int
+        :param count: Number of results in the parsed page.
+        :type count: int
+        :param method: Which API method to request (getRecords vs getDeletedRecordIds).
+        :type method: str
+        :return: Request for the next page, or None if the chain has ended.
+        :rtype: scrapy.Request or None
+        """
+        next_from_index = self.MAX_RECORD_COUNT + from_index
+        # Skip if output record maximum is reached
+        if tenant.max_records and next_from_index > tenant.max_records:
+            return None
+        # Skip if the page was the last one
+        if count < self.to_index(from_index, tenant.max_records) - from_index + 1:
+            self.inc_stat('zoho/pagination/avoided_requests')
+            return None
+        # Skip if the module failed too often
+        if self.is_module_abandoned(tenant, module):
+            self.inc_stat('zoho/pagination/avoided_requests')
+            return None
+        # None if tenant's request quota is exhausted
+        return self.get_page_request(tenant, module, next_from_index, method)
+
+    def get_fields(self, response):
+        """Registers the field types of a module from its getFields `response`, then requests the first page of
+        `Records` (see `ZOHO_TYPED_OUTPUT`).
+
+        :param response: Response object obtained from scrapy's `Request`.
+        :type response: scrapy.http.response.Response
+        :return: Request for the first set of `Records`.
+        :rtype: generator
+        """
+        yield from self.continue_chain(response, self.parse_fields(response))
+
+    def parse_fields(self, response):
+        """Registers the field types of a module from its getFields `response`, followed by the request for the first
+        page of `Records`.
+
+        If the fields cannot be retrieved, the module's values are exported as strings.
+
+        :param response: Response object obtained from scrapy's `Request`.
+        :type response: scrapy.http.response.Response
+        :return: Request for the first set of `Records` (if within the tenant's quota).
+        :rtype: generator
+        """
+        try:
+            json_data = json.loads(response.body.decode())
+        except ValueError:
+            logging.debug('JSON could not be deserialized, url: {0}.'.format(response.url))
+            json_data = None
+        if json_data is not None and not self.is_json_valid(json_data, response.url):
+            json_data = None
+        self.schemas.register(response.meta['tenant'], response.meta['module'], json_data)
+        request = self.get_page_request(self.tenants[response.meta['tenant']], response.meta['module'],
+                                        self.INITIAL_FROM_INDEX)
+        if request is not None:
+            yield request
+
+    def fields_failed(self, failure):
+        """Errback for getFields requests that could not be downloaded, exporting the module's values as strings.
+
+        :param failure: Failure raised while processing the request.
+        :type failure: twisted.python.failure.Failure
+        :return: Request for the first set of `Records`.
+        :rtype: generator
+        """
+        request = failure.request
+        logging.error('Request failed ({0}), url: {1}.'.format(failure.getErrorMessage(), request.url))
+        self.schemas.register(request.meta['tenant'], request.meta['module'], None)
+        yield from self.start_records(self.tenants[request.meta['tenant']], request.meta['module'])
+
+    def start_records(self, tenant, module):
+        """Requests the first page of `Records` for a module whose schema has been registered.
+
+        :param tenant: Zoho CRM org of the module.
+        :type tenant: zoho.tenants.Tenant
+        :param module: Zoho CRM Module name (e.g. Contacts, Leads, etc).
+        :type module: str
+        :return: Request(s) continuing the crawl.
+        :rtype: generator
+        """
+        request = self.get_page_request(tenant, module, self.INITIAL_FROM_INDEX)
+        if request is not None:
+            yield request
+        else:
+            yield from self.finish_chain(tenant, module, 'getRecords')
+
+    def closed(self, reason):
+        """Reports value conversion failures, and modules left unfinished in memory budget mode, once the spider
+        closes.
+
+        :param reason: Reason the spider was closed.
+        :type reason: str
+        :return: Nothing
+        :rtype: None
+        """
+        if self.pending_modules is not None:
+            unfinished = sorted(self.active_modules) + [(tenant_name, module)
+                                                        for tenant_name, modules in self.pending_modules.items()
+                                                        for module in modules]
+            for tenant_name, module in unfinished:
+                logging.warning('Module was not fully crawled ({0}), tenant: {1}, module: {2}.'.format(
+                    reason, tenant_name, module))
+            if unfinished:
+                self.inc_stat('zoho/pagination/unfinished_modules', len(unfinished))
+        if self.schemas is not None:
+            for (tenant_name, module), errors in sorted(self.schemas.errors.items()):
+                logging.warning('{0} value(s) could not be converted for tenant: {1}, module: {2}.'.format(
+                    errors, tenant_name, module))
 
     def get_deleted_records(self, response):
         """Secondary parse for to retrieve all `DeletedRecords` via getDeletedRecordIds.
@@ -212,52 +681,62 @@ class ZohoSpider(scrapy.Spider):
         :return: Typically a new `scrapy.Request` that parses for the next set of `DeletedRecords`.
         :rtype: `scrapy.Request` or None
         """
+        yield from self.continue_chain(response, self.parse_deleted_records(response))
+
+    def parse_deleted_records(self, response):
+        """Parses a getDeletedRecordIds `response` into a `RecordPage`, followed by the request for the next page.
+
+        The deserialized response is only referenced locally, so it is released as soon as the page is parsed.
+
+        :param response: Response object obtained from scrapy's `Request`.
+        :type response: scrapy.http.response.Response
+        :return: `RecordPage` followed by a `scrapy.Request` for the next set of `DeletedRecords` (if any).
+        :rtype: generator
+        """
         # TODO: Detect most recent execution date/time from either S3 timestamped directory or provided user setting
-        self.response = response
-        # Passed module
+        # Passed tenant and module
+        tenant = self.tenants[response.meta['tenant']]
         module = response.meta['module']
 
         # Validate response
         if not self.is_response_valid(response):
+            yield from self.page_error(response)
             return
 
         # Attempt JSON deserialization
         try:
-            self.json_data = json.loads(response.body.decode())
+            json_data = json.loads(response.body.decode())
         except ValueError:
-            logging.debug('JSON could not be deserialized, url: {0}.'.format(self.response.url))
+            logging.debug('JSON could not be deserialized, url: {0}.'.format(response.url))
+            yield from self.page_error(response)
             return
 
-        # Ensure dataset is not empty
-        if not self.has_data(data_type='deleted_record'):
+        # Verify JSON is valid, before an error could be mistaken for missing data
+        if not self.is_json_valid(json_data, response.url):
+            yield from self.page_error(response)
             return
 
-        # Verify JSON is valid
-        if not self.is_json_valid():
+        # Ensure dataset is not empty
+        if not self.has_data(json_data, response.url, data_type='deleted_record'):
             return
 
-        logging.info('Deleted Record data retrieved for module: {0}, url: {1}'.format(module, self.response.url))
-        if self.json_data['response']['result']['DeletedIDs']:
-            id_list = [i.strip() for i in self.json_data['response']['result']['DeletedIDs'].split(',')]
-            for ID in id_list:
-                record = Record()
-                record['module'] = module
-                record['id'] = ID
-                yield record
-
-        # Generate next paginated URL
-        from_index = response.meta['from_index']
-        next_from_index = self.MAX_RECORD_COUNT + from_index
-        next_url = self.get_records_url(module, next_from_index, 'getDeletedRecordIds')
-        max_records = self.settings.get('ZOHO_MAX_RECORDS_PER_MODULE')
-        # Skip if output record maximum is exceeded
-        if max_records and next_from_index > max_records:
-            return
-        # Parse record content for each module
-        yield scrapy.Request(next_url,
-                             meta={'module': module,
-                                   'from_index': next_from_index},
-                             callback=self.get_deleted_records)
+        logging.info('Deleted Record data retrieved for module: {0}, url: {1}'.format(module, response.url))
+        id_list = []
+        if json_data['response']['result']['DeletedIDs']:
+            id_list = [i.strip() for i in json_data['response']['result']['DeletedIDs'].split(',')]
+            # Hand over the whole page to the pipeline as a single item
+            page = RecordPage()
+            page['tenant'] = tenant.name
+            page['module'] = module
+            page['deleted'] = True
+            page['records'] = [{'id': ID} for ID in id_list]
+            yield from self.page_items(page)
+
+        # Parse deleted record content for the next page, if any
+        request = self.get_next_page_request(tenant, module, response.meta['from_index'], len(id_list),
+                                             'getDeletedRecordIds')
+        if request is not None:
+            yield request
 
     def get_records(self, response):
         """Secondary parse for to retrieve all `Records` via getRecords.
@@ -270,60 +749,101 @@ class ZohoSpider(scrapy.Spider):
         :return: Typically a new `scrapy.Request` that parses for the next set of `Records`.
         :rtype: `scrapy.Request` or None
         """
+        yield from self.continue_chain(response, self.parse_records(response))
+
+    def parse_records(self, response):
+        """Parses a getRecords `response` into a `RecordPage`, followed by the request for the next page.
+
+        The deserialized response is only referenced locally, so it is released as soon as the page is parsed.
+
+        :param response: Response object obtained from scrapy's `Request`.
+        :type response: scrapy.http.response.Response
+        :return: `RecordPage` followed by a `scrapy.Request` for the next set of `Records` (if any).
+        :rtype: generator
+        """
         # TODO: Detect most recent execution date/time from either S3 timestamped directory or provided user setting
-        self.response = response
-        # Passed module
+        # Passed tenant and module
+        tenant = self.tenants[response.meta['tenant']]
         module = response.meta['module']
 
         # Validate response
         if not self.is_response_valid(response):
+            yield from self.page_error(response)
             return
 
         # Attempt JSON deserialization
         try:
-            self.json_data = json.loads(response.body.decode())
+            json_data = json.loads(response.body.decode())
         except ValueError:
-            logging.debug('JSON could not be deserialized, url: {0}.'.format(self.response.url))
+            logging.debug('JSON could not be deserialized, url: {0}.'.format(response.url))
+            yield from self.page_error(response)
             return
 
-        # Ensure dataset is not empty
-        if not self.has_data():
+        # Verify JSON is valid, before an error could be mistaken for missing data
+        if not self.is_json_valid(json_data, response.url):
+            yield from self.page_error(response)
             return
 
-        # Verify JSON is valid
-        if not self.is_json_valid():
+        # Ensure dataset is not empty
+        if not self.has_data(json_data, response.url):
             return
 
-        logging.info('Data retrieved for module: {0}, url: {1}'.format(module, self.response.url))
-        for row in self.json_data['response']['result'][module]['row']:
+        logging.info('Data retrieved for module: {0}, url: {1}'.format(module, response.url))
+        # Hand over the whole page to the pipeline as a single item
+        page = RecordPage()
+        page['tenant'] = tenant.name
+        page['module'] = module
+        page['deleted'] = False
+        # A single record (or field) is returned as an object rather than a list
+        page['records'] = [dict((FL['val'], FL['content']) for FL in as_list(row['FL']))
+                           for row in as_list(json_data['response']['result'][module]['row'])]
+        # Convert values of the whole page to their field types
+        if self.schemas is not None:
+            errors = self.schemas.coerce_page(tenant.name, module, page['records'])
+            if errors:
+                logging.debug('{0} value(s) could not be converted, url: {1}.'.format(errors, response.url))
+                self.inc_stat('zoho/coercion_errors/{0}/{1}'.format(tenant.name, module), errors)
+        yield from self.page_items(page)
+
+        # Parse record content for the next page, if any
+        request = self.get_next_page_request(tenant, module, response.meta['from_index'], len(page['records']))
+        if request is not None:
+            yield request
+
+    def page_items(self, page):
+        """Hands over a parsed page as a single `RecordPage`, or as one `Record` per record when feed exports are
+        configured, so feeds (and `item_scraped_count`) keep receiving records.
+
+        :param page: Parsed page of records.
+        :type page: zoho.items.RecordPage
+        :return: Item(s) for the pipeline.
+        :rtype: generator
+        """
+        if not self.record_items:
+            yield page
+            return
+        for values in page['records']:
             record = Record()
-            record['module'] = module
-            for FL in row['FL']:
-                record[FL['val']] = FL['content']
+            record['tenant'] = page['tenant']
+            record['module'] = page['module']
+            for key, value in values.items():
+                record[key] = value
             yield record
 
-        # Generate next paginated URL
-        from_index = response.meta['from_index']
-        next_from_index = self.MAX_RECORD_COUNT + from_index
-        next_url = self.get_records_url(module, next_from_index)
-        max_records = self.settings.get('ZOHO_MAX_RECORDS_PER_MODULE')
-        # Skip if output record maximum is exceeded
-        if max_records and next_from_index > max_records:
-            return
-        # Parse record content for each module
-        yield scrapy.Request(next_url,
-                             meta={'module': module,
-                                   'from_index': next_from_index},
-                             callback=self.get_records)
-
-    def to_index(self, from_index):
+    def to_index(self, from_index, max_records=None):
         """Property to get the `to_index` value for upcoming Zoho CRM API calls.
 
         Read-only.
 
         :param from_index: The `from_index` value that is currently being used.
         :type from_index: int
-        :return: The `to_index` value, incremented accordingly to obtain the most records per API call possible.
+        :param max_records: Max requested records per `Module` (optional, default: None -- Returns all records).
+        :type max_records: int or None
+        :return: The `to_index` value, incremented accordingly to obtain the most records per API call possible without
+            exceeding `max_records`.
         :rtype: int
         """
-        return from_index + self.MAX_RECORD_COUNT - 1
+        to_index = from_index + self.MAX_RECORD_COUNT - 1
+        if max_records:
+            to_index = min(to_index, max_records)
+        return to_index
@@ -6,15 +6,18 @@ class SplitFile:
     """Used to easily split larger output files into smaller, more manageable sets of equally-sized files.  Split files
     are numerically incremented and are processed based on the maximum number of `lines` per file."""
 
-    def __init__(self, path=None, lines=1000, dest_dir=''):
+    def __init__(self, path=None, lines=1000, dest_dir='', source=None):
         """Initializes the `SplitFile` class and assigns important values to class variables.
 
-        :param path: The full `path` to the file intended to be split.
+        :param path: The full `path` to the file intended to be split, or just its name if `source` is passed.
         :type path: str or None
         :param lines: The maximum number of lines for each split file (optional, default: 1000).
         :type lines: int
         :param dest_dir: Desired destination directory in which to place split files (optional, default: '').
         :type dest_dir: str or None
+        :param source: Already open binary file (e.g. an in-memory spooled file) to split, read from its current
+            position, instead of opening `path` (optional, default: None).
+        :type source: io.IOBase or None
         """
         if path is None:
             return
@@ -23,6 +26,7 @@ class SplitFile:
         self.file_name, self.extension = os.path.splitext(os.path.basename(path))
         self.lines = lines
         self.path = path
+        self.source = source
 
         # Initiate split
         self.split()
@@ -39,17 +43,19 @@ class SplitFile:
         :rtype: itertools.Chain
         """
         iterable = iter(iterable)
-        while True:
-            yield chain([next(iterable)], islice(iterable, line-1))
+        # Looping (rather than calling `next` directly) ends the generator cleanly once lines are exhausted (PEP 479)
+        for first in iterable:
+            yield chain([first], islice(iterable, line-1))
 
     def split(self):
-        """Splits all exported files stored in temporary directories into smaller chunks based on maximum `self.lines`
-        size.
+        """Splits the exported file (or `self.source`) into smaller chunks based on maximum `self.lines` size.
+
+        The file is closed once split.
 
         :return: Nothing
         :rtype: None
         """
-        with open(self.path) as original:
+        with (self.source or open(self.path, 'rb')) as original:
             for count, lines in enumerate(self.chunk(original, self.lines)):
                 # Format new split file name
                 split_file_name = '{0}-{1}{2}'.format(os.path.join(self.dest_dir, self.file_name),
@@ -60,5 +66,5 @@ class SplitFile:
                 if split_dir and split_dir != '':
                     os.makedirs(split_dir, exist_ok=True)
                 # write split file lines
-                with open(split_file_name, 'w+') as split_file:
+                with open(split_file_name, 'wb') as split_file:
                     split_file.writelines(lines)
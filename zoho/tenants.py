@@ -0,0 +1,90 @@
+import logging
+import os
+
+DEFAULT_TENANT_NAME = 'default'
+
+
+class Tenant:
+    """A single Zoho CRM org crawled by `ZohoSpider`, with its own credentials, bucket, output prefix and quota.
+
+    Tenants are configured with the `ZOHO_TENANTS` setting.  Without it, a single `default` tenant is built from the
+    global `ZOHO_CRM_AUTH_TOKEN`, `AWS_BUCKET_NAME` and `ZOHO_MAX_RECORDS_PER_MODULE` settings.
+    """
+
+    def __init__(self, name=DEFAULT_TENANT_NAME, auth_token=None, bucket_name=None, output_prefix='',
+                 max_records=None, max_requests=None):
+        """Initializes the `Tenant` class.
+
+        :param name: Unique name of the tenant (optional, default: 'default').
+        :type name: str
+        :param auth_token: Zoho CRM authentication token of the org.
+        :type auth_token: str or None
+        :param bucket_name: Name of AWS S3 bucket to export to.
+        :type bucket_name: str or None
+        :param output_prefix: Directory (and S3 key) prefix for all export files of the tenant (optional, default: '').
+        :type output_prefix: str
+        :param max_records: Max requested records per `Module` (optional, default: None -- Returns all records).
+        :type max_records: int or None
+        :param max_requests: Max API requests for this crawl (optional, default: None -- Unlimited).
+        :type max_requests: int or None
+        """
+        self.auth_token = auth_token
+        self.bucket_name = bucket_name
+        self.max_records = max_records
+        self.max_requests = max_requests
+        self.name = name
+        self.output_prefix = output_prefix
+        self.request_count = 0
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Builds all configured tenants from `ZOHO_TENANTS`, falling back to global settings for missing values.
+
+        :param settings: Active settings.
+        :type settings: scrapy.settings.Settings
+        :return: Tenants, in configured order.
+        :rtype: list
+        :raises ValueError: If tenant names are not unique.
+        """
+        defaults = {'auth_token': settings.get('ZOHO_CRM_AUTH_TOKEN'),
+                    'bucket_name': settings.get('AWS_BUCKET_NAME'),
+                    'max_records': settings.get('ZOHO_MAX_RECORDS_PER_MODULE')}
+        configs = settings.get('ZOHO_TENANTS') or [{}]
+        tenants = [cls(**dict(defaults, **config)) for config in configs]
+        names = [tenant.name for tenant in tenants]
+        if len(set(names)) != len(names):
+            raise ValueError('ZOHO_TENANTS names must be unique: {0}'.format(', '.join(names)))
+        return tenants
+
+    def has_quota(self):
+        """Determines if the tenant may make further API requests, based on `max_requests`.
+
+        :return: Is another request within quota.
+        :rtype: bool
+        """
+        if self.max_requests is None or self.request_count < self.max_requests:
+            return True
+        logging.debug('Request quota of {0} exhausted for tenant: {1}.'.format(self.max_requests, self.name))
+        return False
+
+    def partition_directory(self, base_dir):
+        """Constructs the local root directory of the tenant's date-partitioned output, shared by all crawls.
+
+        :param base_dir: Parent directory for all exports (typically `LOCAL_OUTPUT_DIRECTORY`).
+        :type base_dir: str
+        :return: Path to the tenant's partition root directory.
+        :rtype: str
+        """
+        return os.path.join(base_dir, self.output_prefix)
+
+    def output_directory(self, base_dir, timestamp):
+        """Constructs the timestamped local output directory of the tenant.
+
+        :param base_dir: Parent directory for all exports (typically `LOCAL_OUTPUT_DIRECTORY`).
+        :type base_dir: str
+        :param timestamp: Concatenated timestamp of the crawl.
+        :type timestamp: str
+        :return: Path to the tenant's timestamped output directory.
+        :rtype: str
+        """
+        return os.path.join(base_dir, self.output_prefix, timestamp)
@@ -1,9 +1,18 @@
+import base64
 import boto3
 from boto3.s3.transfer import S3Transfer, TransferConfig
 import botocore
+import collections
+import hashlib
 import logging
+import os
+import posixpath
+
+from zoho.manifest import Manifest
 
 RESOURCE_TYPE = 's3'
+# Part size used by the transfer manager when `S3_MULTIPART_CHUNKSIZE` isn't set
+DEFAULT_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
 
 
 class ZohoS3:
@@ -14,30 +23,32 @@ class ZohoS3:
     """
     bucket_name = None
     resource = None
-    spider = None
+    settings = None
+    transfer = None
 
-    def __init__(self, spider):
-        """Initializes the `ZohoS3` class amd generates a `boto3.Session`, `resource.meta.client`, and S3 bucket
-        (if needed).
+    def __init__(self, settings):
+        """Initializes the `ZohoS3` class amd generates a `boto3.Session`, `resource.meta.client`, S3 bucket
+        (if needed) and a single `S3Transfer` shared by all uploads.
 
-        Appropriate errors are called if connection fails at any point in the chain.
+        Appropriate errors are called if connection fails at any point in the chain.  When `AWS_BUCKET_NAME` isn't
+        set, every upload must specify its own bucket (e.g. per tenant, see `ZOHO_TENANTS`).
 
-        :param spider: `scrapy.Spider` reference for use throughout the class instance.
-        :type spider: scrapy.Spider
+        :param settings: `scrapy.settings.Settings` (or `zoho.cli.CommandSettings`) for use throughout the class
+            instance.
+        :type settings: scrapy.settings.Settings
         """
-        # Assign spider
-        self.spider = spider
+        # Assign settings
+        self.settings = settings
         # Assign bucket name
-        self.bucket_name = spider.settings.get('AWS_BUCKET_NAME')
-        if self.bucket_name is None:
-            logging.error('ZohoS3 requires valid AWS_BUCKET_NAME setting in scrapy config.')
-            return
+        self.bucket_name = settings.get('AWS_BUCKET_NAME')
+        # Names of buckets known to exist
+        self.buckets = set()
 
         # Create session object
         try:
             session = boto3.Session(
-                aws_access_key_id=spider.settings.get('AWS_ACCESS_KEY_ID'),
-                aws_secret_access_key=spider.settings.get('AWS_SECRET_ACCESS_KEY')
+                aws_access_key_id=settings.get('AWS_ACCESS_KEY_ID'),
+                aws_secret_access_key=settings.get('AWS_SECRET_ACCESS_KEY')
             )
         except botocore.exceptions.ClientError:
             logging.error('Unable to create S3 session.')
@@ -51,17 +62,29 @@ class ZohoS3:
         # Get client
         self.client = self.resource.meta.client
 
+        # Create transfer manager, shared by all uploads
+        config = TransferConfig(
+            num_download_attempts=self.settings.get('S3_NUM_DOWNLOAD_ATTEMPTS'),
+            max_concurrency=self.settings.get('S3_MAX_CONCURRENCY'),
+            multipart_chunksize=self.settings.get('S3_MULTIPART_CHUNKSIZE'),
+            multipart_threshold=self.settings.get('S3_MULTIPART_THRESHOLD')
+        )
+        self.transfer = S3Transfer(self.client, config)
+
         # Get bucket
-        self.bucket = self.get_bucket()
+        if self.bucket_name:
+            self.bucket = self.get_bucket()
 
-    def bucket_exists(self):
-        """Determines if the specified bucket name in `AWS_BUCKET_NAME` already exists in S3.
+    def bucket_exists(self, bucket_name=None):
+        """Determines if the specified bucket name (default: `AWS_BUCKET_NAME`) already exists in S3.
 
+        :param bucket_name: Name of the bucket (optional, default: `AWS_BUCKET_NAME`).
+        :type bucket_name: str or None
         :return: Does the bucket exist.
         :rtype: bool
         """
         try:
-            self.resource.meta.client.head_bucket(Bucket=self.bucket_name)
+            self.resource.meta.client.head_bucket(Bucket=bucket_name or self.bucket_name)
         except botocore.exceptions.ClientError as e:
             # If a client error is thrown, then check that it was a 404 error.
             # If it was a 404 error, then the bucket does not exist.
@@ -70,15 +93,17 @@ class ZohoS3:
                 return False
         return True
 
-    def create_bucket(self):
+    def create_bucket(self, bucket_name=None):
         """Creates a new bucket from the `AWS_BUCKET_NAME`.  `self.bucket_exists()` must be called first to verify
         that a new bucket can and should be created.
 
+        :param bucket_name: Name of the bucket (optional, default: `AWS_BUCKET_NAME`).
+        :type bucket_name: str or None
         :return: Nothing
         :rtype: None
         """
         # Generate bucket
-        self.resource.create_bucket(Bucket=self.bucket_name)
+        self.resource.create_bucket(Bucket=bucket_name or self.bucket_name)
 
     def format_remote_path(self, path):
         """Ugly hack for proper AWS S3 path formatting.
@@ -86,29 +111,193 @@ class ZohoS3:
         Due to underlying operating system, when using the Zoho CRM API crawler module on Windows, it may be
         necessary to perform cleanup on the paths.
 
+        Only a leading `LOCAL_OUTPUT_DIRECTORY` is removed, so names containing it (e.g. an `output_prefix`) are kept.
+
         :param path: Path to properly format.
         :type path: str
         :return: Formatted path.
         :rtype: str
         """
-        output_dir = self.spider.settings.get('LOCAL_OUTPUT_DIRECTORY')
-        remote_path = path.replace(output_dir, '').replace('\\', '/')
+        output_dir = (self.settings.get('LOCAL_OUTPUT_DIRECTORY') or '').replace('\\', '/').rstrip('/')
+        remote_path = path.replace('\\', '/')
+        if output_dir and (remote_path == output_dir or remote_path.startswith(output_dir + '/')):
+            remote_path = remote_path[len(output_dir):]
         if remote_path.startswith('/'):
             remote_path = remote_path[1:]
         return remote_path
 
-    def get_bucket(self):
+    def get_bucket(self, bucket_name=None):
         """Creates a new bucket (if necessary), then retrieve valid bucket `resource.Bucket` instance for use elsewhere.
 
+        Each bucket is only checked (and created) once per `ZohoS3` instance.
+
+        :param bucket_name: Name of the bucket (optional, default: `AWS_BUCKET_NAME`).
+        :type bucket_name: str or None
         :return: Active `resource.Bucket`.
         :rtype: resource.Bucket
         """
+        bucket_name = bucket_name or self.bucket_name
         # if exists, create
-        if not self.bucket_exists():
-            self.create_bucket()
-        return self.resource.Bucket(self.bucket_name)
+        if bucket_name not in self.buckets:
+            if not self.bucket_exists(bucket_name):
+                self.create_bucket(bucket_name)
+            self.buckets.add(bucket_name)
+        return self.resource.Bucket(bucket_name)
+
+    def upload_directory(self, local_dir, bucket_name=None, run=None):
+        """Uploads every file found within `local_dir` (recursively) to Amazon S3, recording a `zoho.manifest.Manifest`
+        of the directory.
+
+        Content that is already in S3 isn't transferred again.  Files unchanged since the previous manifest (see
+        `zoho.manifest.Manifest.load_previous`) are skipped if they are already stored at their key (a retried
+        upload), or copied within S3 from their previous key.  With `S3_CONTENT_ADDRESSED`, file content is stored
+        under `objects/<md5>` keys shared by all runs, and any file whose object already exists is skipped.
+
+        Every object is verified against the manifest, which is then saved to `local_dir` and uploaded with the files.
+
+        With `run`, `local_dir` is a partition root shared by all crawls (see `OUTPUT_PARTITION_FIELD`): only the chunk
+        files of crawl `run` are uploaded, keeping their partition keys (so `S3_CONTENT_ADDRESSED` doesn't apply), and
+        the manifest is stored as `_manifests/<run>.json`.
+
+        :param local_dir: Local directory to upload, typically a timestamped directory within `LOCAL_OUTPUT_DIRECTORY`.
+        :type local_dir: str
+        :param bucket_name: Name of the bucket (optional, default: `AWS_BUCKET_NAME`).
+        :type bucket_name: str or None
+        :param run: Name of the crawl to upload from a partition root (optional, default: None).
+        :type run: str or None
+        :return: Nothing
+        :rtype: None
+        """
+        bucket_name = bucket_name or self.bucket_name
+        if bucket_name is None:
+            logging.error('ZohoS3 requires valid AWS_BUCKET_NAME setting in scrapy config.')
+            return
+        self.get_bucket(bucket_name)
+
+        content_addressed = self.settings.get('S3_CONTENT_ADDRESSED') and run is None
+        manifest = Manifest.from_directory(local_dir, run)
+        previous = Manifest.load_previous(local_dir, run) or Manifest()
+        run_key = self.format_remote_path(local_dir)
+        results = collections.Counter()
+        for relative_path, entry in sorted(manifest.entries.items()):
+            entry['key'] = posixpath.join(run_key, relative_path)
+            entry['object_key'] = entry['key']
+            if content_addressed:
+                entry['object_key'] = posixpath.join(posixpath.dirname(run_key),
+                                                     'objects',
+                                                     entry['md5'] + posixpath.splitext(relative_path)[1])
+            result = self.transfer_entry(os.path.join(local_dir, relative_path), entry, previous, bucket_name,
+                                         content_addressed)
+            entry['uploaded'] = result is not None
+            results[result or 'failed'] += 1
+
+        manifest_path = Manifest.manifest_path(local_dir, run)
+        manifest.save(manifest_path)
+        self.upload(manifest_path, manifest_path, bucket_name)
+        logging.info('Uploaded {0}, copied {1}, skipped {2} and failed {3} files from {4}.'.format(
+            results['uploaded'], results['copied'], results['skipped'], results['failed'], local_dir))
+
+    def transfer_entry(self, local_path, entry, previous, bucket_name, content_addressed=False):
+        """Transfers a single manifest `entry` to its `object_key`, moving as few bytes as possible.
+
+        :param local_path: Full path to the local file.
+        :type local_path: str
+        :param entry: Manifest entry of the file, including its `object_key`.
+        :type entry: dict
+        :param previous: Manifest of the previous upload.
+        :type previous: zoho.manifest.Manifest
+        :param bucket_name: Name of the bucket.
+        :type bucket_name: str
+        :param content_addressed: Is `object_key` content-addressed (optional, default: False).
+        :type content_addressed: bool
+        :return: How the object was transferred ('skipped', 'copied' or 'uploaded'), or None if it failed.
+        :rtype: str or None
+        """
+        # Content already stored at its key
+        if content_addressed or previous.find_uploaded(entry['md5'], entry['object_key']):
+            if self.verify(entry, bucket_name, local_path):
+                return 'skipped'
+
+        # Identical content stored at another key by the previous upload
+        source = None if content_addressed else previous.find_uploaded(entry['md5'])
+        if source is not None:
+            try:
+                self.client.copy_object(Bucket=bucket_name,
+                                        Key=entry['object_key'],
+                                        CopySource={'Bucket': bucket_name, 'Key': source['object_key']},
+                                        ChecksumAlgorithm='CRC32')
+            except botocore.exceptions.ClientError:
+                logging.debug('Unable to copy {0} to {1}, uploading instead.'.format(source['object_key'],
+                                                                                    entry['object_key']))
+            else:
+                if self.verify(entry, bucket_name, local_path):
+                    return 'copied'
+
+        if self.upload(local_path, entry['object_key'], bucket_name,
+                       extra_args={'ChecksumAlgorithm': 'CRC32',
+                                   'Metadata': {'md5': entry['md5'], 'crc32': entry['crc32']}},
+                       format_path=False) \
+                and self.verify(entry, bucket_name, local_path):
+            return 'uploaded'
+        logging.error('Unable to verify upload of file {0} to {1}'.format(local_path, entry['object_key']))
+        return None
+
+    def verify(self, entry, bucket_name, local_path=None):
+        """Determines if the object at the `object_key` of `entry` matches the entry's size and checksums, as computed
+        by S3 from the stored bytes.
+
+        The full object CRC32 checksum is compared where S3 has one, otherwise the `ETag`: the MD5 checksum for single
+        part objects, or the MD5 checksum of the part checksums (recomputed from `local_path`) for multipart uploads.
+
+        :param entry: Manifest entry of the file.
+        :type entry: dict
+        :param bucket_name: Name of the bucket.
+        :type bucket_name: str
+        :param local_path: Full path to the local file, required to verify multipart uploads (optional, default: None).
+        :type local_path: str or None
+        :return: Does the stored object match.
+        :rtype: bool
+        """
+        try:
+            head = self.client.head_object(Bucket=bucket_name, Key=entry['object_key'], ChecksumMode='ENABLED')
+        except botocore.exceptions.ClientError:
+            return False
+        if head['ContentLength'] != entry['size']:
+            return False
+        if head.get('ChecksumCRC32') and head.get('ChecksumType', 'FULL_OBJECT') == 'FULL_OBJECT':
+            return head['ChecksumCRC32'] == base64.b64encode(bytes.fromhex(entry['crc32'])).decode()
+        etag = head.get('ETag', '').strip('"')
+        if '-' not in etag:
+            return etag == entry['md5']
+        if local_path is None:
+            return False
+        parts = int(etag.split('-')[1])
+        # The transfer manager doubles the configured part size until the file fits in the maximum number of parts
+        part_size = self.settings.get('S3_MULTIPART_CHUNKSIZE') or DEFAULT_MULTIPART_CHUNKSIZE
+        while -(-entry['size'] // part_size) > parts:
+            part_size *= 2
+        return etag == self.multipart_etag(local_path, part_size, parts)
+
+    @staticmethod
+    def multipart_etag(local_path, part_size, parts):
+        """Computes the `ETag` S3 assigns to a multipart upload of a local file.
 
-    def upload(self, local_path, remote_path=''):
+        :param local_path: Full path to the local file.
+        :type local_path: str
+        :param part_size: Size of each part (but the last) in bytes.
+        :type part_size: int
+        :param parts: Number of parts.
+        :type parts: int
+        :return: MD5 checksum of the part MD5 checksums, suffixed by the number of parts.
+        :rtype: str
+        """
+        digests = []
+        with open(local_path, 'rb') as file:
+            for part in iter(lambda: file.read(part_size), b''):
+                digests.append(hashlib.md5(part).digest())
+        return '{0}-{1}'.format(hashlib.md5(b''.join(digests)).hexdigest(), parts)
+
+    def upload(self, local_path, remote_path='', bucket_name=None, extra_args=None, format_path=True):
         """Uploads the specified local file to Amazon S3.
 
         Utilizes numerous `AWS_` settings to handle transfer limitations and speed.  See `settings.py` for details.
@@ -117,20 +306,28 @@ class ZohoS3:
         :type local_path: str
         :param remote_path: Full remote path (within the bucket) to place the file in on S3 (optional, default: '').
         :type remote_path: str or None
-        :return: Nothing
-        :rtype: None
+        :param bucket_name: Name of the bucket (optional, default: `AWS_BUCKET_NAME`).
+        :type bucket_name: str or None
+        :param extra_args: Extra arguments for the upload, such as `Metadata` (optional, default: None).
+        :type extra_args: dict or None
+        :param format_path: Format `remote_path` from a local path (optional, default: True -- Set to False if it is
+            already an S3 key).
+        :type format_path: bool
+        :return: Was the file uploaded.
+        :rtype: bool
         """
+        bucket_name = bucket_name or self.bucket_name
+        if bucket_name is None:
+            logging.error('ZohoS3 requires valid AWS_BUCKET_NAME setting in scrapy config.')
+            return False
         try:
-            config = TransferConfig(
-                num_download_attempts=self.spider.settings.get('S3_NUM_DOWNLOAD_ATTEMPTS'),
-                max_concurrency=self.spider.settings.get('S3_MAX_CONCURRENCY'),
-                multipart_chunksize=self.spider.settings.get('S3_MULTIPART_CHUNKSIZE'),
-                multipart_threshold=self.spider.settings.get('S3_MULTIPART_THRESHOLD')
-            )
-            transfer = S3Transfer(self.client, config)
-            transfer.upload_file(local_path,
-                                 self.bucket_name,
-                                 self.format_remote_path(remote_path))
+            self.get_bucket(bucket_name)
+            self.transfer.upload_file(local_path,
+                                      bucket_name,
+                                      self.format_remote_path(remote_path) if format_path else remote_path,
+                                      extra_args=extra_args)
 
         except botocore.exceptions.ClientError as e:
             logging.error('Unable to upload file {0} from path {1}'.format(local_path, remote_path))
+            return False
+        return True